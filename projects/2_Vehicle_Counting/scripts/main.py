@@ -1,4 +1,3 @@
-import numpy as np
 import cv2
 import sys
 import os
@@ -7,94 +6,60 @@ import os
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 VIDEO_PATH = os.path.join(BASE_DIR, "dataset", "Ponte.mp4")
 
-ALGORITHM_TYPES = ["KNN", "GMG", "CNT", "MOG", "MOG2"]
-ALGORITHM_TYPE = ALGORITHM_TYPES[1]
-
-
-def get_kernel(kernel_type):
-    if kernel_type == "dilation":
-        return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-    if kernel_type in ["opening", "closing"]:
-        return np.ones((3, 3), np.uint8)
-    return None
-
-
-def apply_filter(img, filter_type):
-    if filter_type == "closing":
-        return cv2.morphologyEx(
-            img, cv2.MORPH_CLOSE, get_kernel("closing"), iterations=2
-        )
-    if filter_type == "opening":
-        return cv2.morphologyEx(
-            img, cv2.MORPH_OPEN, get_kernel("opening"), iterations=2
-        )
-    if filter_type == "dilation":
-        return cv2.dilate(img, get_kernel("dilation"), iterations=2)
-    if filter_type == "combine":
-        closing = cv2.morphologyEx(
-            img, cv2.MORPH_CLOSE, get_kernel("closing"), iterations=2
-        )
-        opening = cv2.morphologyEx(
-            closing, cv2.MORPH_OPEN, get_kernel("opening"), iterations=2
-        )
-        dilation = cv2.dilate(opening, get_kernel("dilation"), iterations=2)
-        return dilation
-    return img
+# Reaproveita o motor de contagem compartilhado com o painel Streamlit
+REPO_DIR = os.path.dirname(os.path.dirname(BASE_DIR))
+sys.path.insert(0, os.path.join(REPO_DIR, "streamlit_app"))
 
+from utils.traffic import (  # noqa: E402
+    VehicleCounter,
+    count_video_parallel,
+    draw_detections,
+)
+from utils.video import FrameSource  # noqa: E402
 
-def get_subtractor(algorithm_type):
-    if algorithm_type == "KNN":
-        return cv2.createBackgroundSubtractorKNN()
-    if algorithm_type == "GMG":
-        return cv2.bgsegm.createBackgroundSubtractorGMG()
-    if algorithm_type == "CNT":
-        return cv2.bgsegm.createBackgroundSubtractorCNT()
-    if algorithm_type == "MOG":
-        return cv2.bgsegm.createBackgroundSubtractorMOG()
-    if algorithm_type == "MOG2":
-        return cv2.createBackgroundSubtractorMOG2()
-    print("Invalid detector")
-    sys.exit(1)
-
-
-# Minimum rectangle size for detection
-MIN_WIDTH = 40
-MIN_HEIGHT = 40
-PIXEL_OFFSET = 2
-ROI_LINE = 620
-vehicle_count = 0
-
-
-def get_centroid(x, y, w, h):
-    """Calculate the centroid of a rectangle."""
-    cx = x + w // 2
-    cy = y + h // 2
-    return cx, cy
-
+ALGORITHM_TYPES = ["KNN", "GMG", "CNT", "MOG", "MOG2"]
+ALGORITHM_TYPE = ALGORITHM_TYPES[1]
 
-centroids = []
+# Fração da resolução usada no processamento (ex.: 0.35 como em Aula3-Desafio.py)
+PROCESSING_SCALE = 1.0
 
+# "single" runs one morphology iteration per step: barely faster and it
+# changes the counts (see MorphologyPipeline)
+MORPHOLOGY_MODE = "exact"
 
-def update_vehicle_count(centroids, frame):
-    global vehicle_count
-    for x, y in centroids[:]:
-        if (ROI_LINE + PIXEL_OFFSET) > y > (ROI_LINE - PIXEL_OFFSET):
-            vehicle_count += 1
-            cv2.line(frame, (25, ROI_LINE), (1200, ROI_LINE), (0, 127, 255), 3)
-            centroids.remove((x, y))
-            print(f"Vehicles detected so far: {vehicle_count}")
+# Set to False to count at full decoder speed without any window
+SHOW_VIDEO = True
+# With SHOW_VIDEO off, > 1 splits the video into segments counted in parallel
+# (GMG only; other algorithms are counted sequentially, see count_video_parallel)
+PARALLEL_WORKERS = 0
 
 
-def display_info(frame):
+def display_info(frame, vehicle_count):
     text = f"Vehicles: {vehicle_count}"
     cv2.putText(frame, text, (450, 70), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 5)
     cv2.imshow("Original Video", frame)
 
 
 def main():
-    cap = cv2.VideoCapture(VIDEO_PATH)
-    background_subtractor = get_subtractor(ALGORITHM_TYPE)
-    global centroids
+    if ALGORITHM_TYPE not in ALGORITHM_TYPES:
+        print("Invalid detector")
+        sys.exit(1)
+
+    if not SHOW_VIDEO and PARALLEL_WORKERS > 1:
+        result = count_video_parallel(
+            VIDEO_PATH,
+            workers=PARALLEL_WORKERS,
+            algorithm_type=ALGORITHM_TYPE,
+            scale=PROCESSING_SCALE,
+            morphology_mode=MORPHOLOGY_MODE,
+        )
+        print(f"Total vehicles: {result['count']} ({result['frames']} frames)")
+        return
+
+    cap = FrameSource(VIDEO_PATH)
+    counter = VehicleCounter(
+        ALGORITHM_TYPE, scale=PROCESSING_SCALE, morphology_mode=MORPHOLOGY_MODE
+    )
 
     while True:
         ok, frame = cap.read()
@@ -102,28 +67,24 @@ def main():
             print("No more frames!")
             break
 
-        mask = background_subtractor.apply(frame)
-        mask = apply_filter(mask, "combine")
+        event = counter.process(frame)
+        if event["crossings"]:
+            print(f"Vehicles detected so far: {event['count']}")
 
-        contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        cv2.line(frame, (25, ROI_LINE), (1200, ROI_LINE), (255, 127, 0), 3)
-        for c in contours:
-            x, y, w, h = cv2.boundingRect(c)
-            if w >= MIN_WIDTH and h >= MIN_HEIGHT:
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                centroid = get_centroid(x, y, w, h)
-                centroids.append(centroid)
-                cv2.circle(frame, centroid, 4, (0, 0, 255), -1)
+        if not SHOW_VIDEO:
+            continue
 
-        update_vehicle_count(centroids, frame)
-        display_info(frame)
+        draw_detections(frame, event, counter.roi_line)
+        display_info(frame, event["count"])
 
         key = cv2.waitKey(10) & 0xFF
         if key == 27 or key == ord("q"):  # ESC or 'q'
             break
 
-    cv2.destroyAllWindows()
+    if SHOW_VIDEO:
+        cv2.destroyAllWindows()
     cap.release()
+    print(f"Total vehicles: {counter.vehicle_count}")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,6 @@
 import cv2
 import mediapipe as mp
+import numpy as np
 
 mp_maos = mp.solutions.hands
 mp_desenho = mp.solutions.drawing_utils
@@ -16,41 +17,39 @@ camera.set(cv2.CAP_PROP_FRAME_HEIGHT, resolucao_y)
 def encotra_coordenadas_maos(img, lado_invertido=False):
     img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     resultado = maos.process(img_rgb)
-    todas_maos = []
-    if resultado.multi_hand_landmarks:
-        for lado_mao, marcacoes_maos in zip(
-            resultado.multi_handedness, resultado.multi_hand_landmarks
-        ):
-            info_mao = {}
-            coordenadas = []
-            for marcacao in marcacoes_maos.landmark:
-                coord_x, coord_y, coord_z = (
-                    int(marcacao.x * resolucao_x),
-                    int(marcacao.y * resolucao_y),
-                    int(marcacao.z * resolucao_x),
-                )
-                coordenadas.append((coord_x, coord_y, coord_z))
-            info_mao["coordenadas"] = coordenadas
-            if lado_invertido:
-                if lado_mao.classification[0].label == "Left":
-                    info_mao["lado"] = "Right"
-                else:
-                    info_mao["lado"] = "Left"
-            else:
-                info_mao["lado"] = lado_mao.classification[0].label
-
-            print(lado_mao.classification[0].label)
-
-            todas_maos.append(info_mao)
-            mp_desenho.draw_landmarks(img, marcacoes_maos, mp_maos.HAND_CONNECTIONS)
-    return img, todas_maos
+    if not resultado.multi_hand_landmarks:
+        return img, np.empty((0, 21, 3), np.int32), np.empty(0, "<U5")
+
+    # Um único array (maos, 21, 3) em pixels; z segue a escala da largura
+    marcacoes = np.array(
+        [
+            [
+                (marcacao.x, marcacao.y, marcacao.z)
+                for marcacao in marcacoes_maos.landmark
+            ]
+            for marcacoes_maos in resultado.multi_hand_landmarks
+        ]
+    )
+    coordenadas = (marcacoes * (resolucao_x, resolucao_y, resolucao_x)).astype(np.int32)
+    lados = np.array(
+        [lado_mao.classification[0].label for lado_mao in resultado.multi_handedness]
+    )
+    if lado_invertido:
+        lados = np.where(lados == "Left", "Right", "Left")
+
+    for lado in lados:
+        print(lado)
+
+    for marcacoes_maos in resultado.multi_hand_landmarks:
+        mp_desenho.draw_landmarks(img, marcacoes_maos, mp_maos.HAND_CONNECTIONS)
+    return img, coordenadas, lados
 
 
 while True:
     sucesso, img = camera.read()
     img = cv2.flip(img, 1)
 
-    img, todas_maos = encotra_coordenadas_maos(img)
+    img, coordenadas, lados = encotra_coordenadas_maos(img)
 
     cv2.imshow("Imagem", img)
 
@@ -51,52 +51,37 @@ x_quadro, y_quadro = 0, 0
 def encotra_coordenadas_maos(img, lado_invertido=False):
     img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     resultado = maos.process(img_rgb)
-    todas_maos = []
-    if resultado.multi_hand_landmarks:
-        for lado_mao, marcacoes_maos in zip(
-            resultado.multi_handedness, resultado.multi_hand_landmarks
-        ):
-            info_mao = {}
-            coordenadas = []
-            for marcacao in marcacoes_maos.landmark:
-                coord_x, coord_y, coord_z = (
-                    int(marcacao.x * resolucao_x),
-                    int(marcacao.y * resolucao_y),
-                    int(marcacao.z * resolucao_x),
-                )
-                coordenadas.append((coord_x, coord_y, coord_z))
-            info_mao["coordenadas"] = coordenadas
-            if lado_invertido:
-                if lado_mao.classification[0].label == "Left":
-                    info_mao["lado"] = "Right"
-                else:
-                    info_mao["lado"] = "Left"
-            else:
-                info_mao["lado"] = lado_mao.classification[0].label
-
-            todas_maos.append(info_mao)
-            mp_desenho.draw_landmarks(img, marcacoes_maos, mp_maos.HAND_CONNECTIONS)
-    return img, todas_maos
-
-
-def dedos_levantados(mao):
-    dedos = []
-    if mao["lado"] == "Right":
-        if mao["coordenadas"][4][0] < mao["coordenadas"][3][0]:
-            dedos.append(True)
-        else:
-            dedos.append(False)
-    else:
-        if mao["coordenadas"][4][0] > mao["coordenadas"][3][0]:
-            dedos.append(True)
-        else:
-            dedos.append(False)
-    for ponta_dedo in [8, 12, 16, 20]:
-        if mao["coordenadas"][ponta_dedo][1] < mao["coordenadas"][ponta_dedo - 2][1]:
-            dedos.append(True)
-        else:
-            dedos.append(False)
-    return dedos
+    if not resultado.multi_hand_landmarks:
+        return img, np.empty((0, 21, 3), np.int32), np.empty(0, "<U5")
+
+    # Um único array (maos, 21, 3) em pixels; z segue a escala da largura
+    marcacoes = np.array(
+        [
+            [
+                (marcacao.x, marcacao.y, marcacao.z)
+                for marcacao in marcacoes_maos.landmark
+            ]
+            for marcacoes_maos in resultado.multi_hand_landmarks
+        ]
+    )
+    coordenadas = (marcacoes * (resolucao_x, resolucao_y, resolucao_x)).astype(np.int32)
+    lados = np.array(
+        [lado_mao.classification[0].label for lado_mao in resultado.multi_handedness]
+    )
+    if lado_invertido:
+        lados = np.where(lados == "Left", "Right", "Left")
+
+    for marcacoes_maos in resultado.multi_hand_landmarks:
+        mp_desenho.draw_landmarks(img, marcacoes_maos, mp_maos.HAND_CONNECTIONS)
+    return img, coordenadas, lados
+
+
+def dedos_levantados(coordenadas, lados):
+    """(maos, 5) booleanos, polegar primeiro, comparando todas as mãos de uma vez."""
+    x, y = coordenadas[..., 0], coordenadas[..., 1]
+    polegar = np.where(lados == "Right", x[..., 4] < x[..., 3], x[..., 4] > x[..., 3])
+    outros_dedos = y[..., [8, 12, 16, 20]] < y[..., [6, 10, 14, 18]]
+    return np.concatenate([polegar[..., None], outros_dedos], axis=-1)
 
 
 def imprime_botoes(img, posicao, letra, tamanho=50, cor_retangulo=COR_BRANCO):
@@ -223,24 +208,23 @@ while True:
     sucesso, img = camera.read()
     img = cv2.flip(img, 1)
 
-    img, todas_maos = encotra_coordenadas_maos(img)
+    img, coordenadas, lados = encotra_coordenadas_maos(img)
 
-    if len(todas_maos) == 1:
-        info_dedos_mao1 = dedos_levantados(todas_maos[0])
-        if todas_maos[0]["lado"] == "Right":
-            img = processa_mao_direita(
-                img, info_dedos_mao1, todas_maos[0]["coordenadas"][8]
-            )
-        if todas_maos[0]["lado"] == "Left":
+    dedos = dedos_levantados(coordenadas, lados)
+
+    if len(coordenadas) == 1:
+        info_dedos_mao1 = dedos[0].tolist()
+        if lados[0] == "Right":
+            img = processa_mao_direita(img, info_dedos_mao1, coordenadas[0, 8].tolist())
+        if lados[0] == "Left":
             if not processa_mao_esquerda(info_dedos_mao1):
                 break
 
-    if len(todas_maos) == 2:
-        info_dedos_mao1 = dedos_levantados(todas_maos[0])
-        info_dedos_mao2 = dedos_levantados(todas_maos[1])
+    if len(coordenadas) == 2:
+        info_dedos_mao1, info_dedos_mao2 = dedos.tolist()
 
         img = processa_desenho(
-            img, info_dedos_mao1, info_dedos_mao2, todas_maos[0]["coordenadas"][8]
+            img, info_dedos_mao1, info_dedos_mao2, coordenadas[0, 8].tolist()
         )
 
     cv2.imshow("Imagem", img)
@@ -1,10 +1,20 @@
 import cv2
-import mediapipe as mp
 import os
 import numpy as np
+import sys
 from time import sleep
 from pynput.keyboard import Controller, Key
 
+# Reaproveita a leitura de frames em thread do painel Streamlit
+REPO_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+)
+sys.path.insert(0, os.path.join(REPO_DIR, "streamlit_app"))
+
+from utils.hand_tracking import HandTracker  # noqa: E402
+from utils.landmarks import fingers_up  # noqa: E402
+from utils.video import FrameSource  # noqa: E402
+
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 BLUE = (255, 0, 0)
@@ -12,27 +22,26 @@ GREEN = (0, 255, 0)
 RED = (0, 0, 255)
 LIGHT_BLUE = (255, 255, 0)
 
-try:
-    mp_hands = mp.solutions.hands
-    mp_draw = mp.solutions.drawing_utils
-except AttributeError:
-    import mediapipe.python.solutions.hands as mp_hands
-    import mediapipe.python.solutions.drawing_utils as mp_draw
-
-hands = mp_hands.Hands()
-
 RES_X = 1280
 RES_Y = 720
+
+# Detecção em baixa resolução e recorte ao redor das mãos; a largura de
+# detecção cai enquanto cada quadro passar do orçamento de latência
+DETECT_WIDTH = 320
+LATENCY_BUDGET_MS = 40
+
+tracker = HandTracker(detect_width=DETECT_WIDTH, latency_budget_ms=LATENCY_BUDGET_MS)
 FONT = cv2.FONT_HERSHEY_DUPLEX
 
-FINGER_1 = [False, True, False, False, False]
-FINGER_1_2 = [False, True, True, False, False]
-FINGER_1_2_3 = [False, True, True, True, False]
-FINGER_1_4 = [False, True, False, False, True]
-FINGER_4 = [False, False, False, False, True]
-FINGER_0 = [True, False, False, False, False]
-FINGER_NONE = [False, False, False, False, False]
-FINGER_ALL = [True, True, True, True, True]
+# Gestos como vetores booleanos (polegar primeiro), comparados com is_gesture
+FINGER_1 = np.array([False, True, False, False, False])
+FINGER_1_2 = np.array([False, True, True, False, False])
+FINGER_1_2_3 = np.array([False, True, True, True, False])
+FINGER_1_4 = np.array([False, True, False, False, True])
+FINGER_4 = np.array([False, False, False, False, True])
+FINGER_0 = np.array([True, False, False, False, False])
+FINGER_NONE = np.array([False, False, False, False, False])
+FINGER_ALL = np.array([True, True, True, True, True])
 
 KEYS = [
     ["Q", "W", "E", "R", "T", "Y", "U", "O", "P"],
@@ -42,6 +51,18 @@ KEYS = [
 
 OFFSET = 80
 BTN_SIZE = 50
+KEY_STEP = BTN_SIZE + 30
+
+# (tecla, posição) de cada botão, na ordem de KEYS
+KEY_LAYOUT = [
+    (key, (OFFSET + col_idx * KEY_STEP, OFFSET + row_idx * KEY_STEP))
+    for row_idx, row in enumerate(KEYS)
+    for col_idx, key in enumerate(row)
+]
+# Região ocupada pelo teclado (inclui a borda de 1 px dos botões)
+KB_X0, KB_Y0 = OFFSET, OFFSET
+KB_X1 = max(x for _, (x, _) in KEY_LAYOUT) + BTN_SIZE + 1
+KB_Y1 = max(y for _, (_, y) in KEY_LAYOUT) + BTN_SIZE + 1
 
 INSTRUCTION = """
     *Type text*:\n
@@ -65,41 +86,12 @@ INSTRUCTION = """
 
 
 def get_hand_landmarks(img, flip_side=False):
-    """Detect hand landmarks and return their coordinates and side."""
-    img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    result = hands.process(img_rgb)
-    all_hands = []
-    if result.multi_hand_landmarks:
-        for hand_side, hand_landmarks in zip(
-            result.multi_handedness, result.multi_hand_landmarks
-        ):
-            hand_info = {}
-            coords = []
-            for lm in hand_landmarks.landmark:
-                x, y, z = int(lm.x * RES_X), int(lm.y * RES_Y), int(lm.z * RES_X)
-                coords.append((x, y, z))
-            hand_info["coords"] = coords
-            if flip_side:
-                hand_info["side"] = (
-                    "Right" if hand_side.classification[0].label == "Left" else "Left"
-                )
-            else:
-                hand_info["side"] = hand_side.classification[0].label
-            all_hands.append(hand_info)
-            mp_draw.draw_landmarks(img, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-    return img, all_hands
+    """Detect hands; return (img, coords (H, 21, 3) int32, sides (H,))."""
+    return tracker.find_hands(img, flip_side=flip_side)
 
 
-def fingers_up(hand):
-    """Return a list indicating which fingers are up."""
-    fingers = []
-    if hand["side"] == "Right":
-        fingers.append(hand["coords"][4][0] < hand["coords"][3][0])
-    else:
-        fingers.append(hand["coords"][4][0] > hand["coords"][3][0])
-    for tip in [8, 12, 16, 20]:
-        fingers.append(hand["coords"][tip][1] < hand["coords"][tip - 2][1])
-    return fingers
+def is_gesture(hand_fingers, gesture):
+    return bool(np.all(hand_fingers == gesture))
 
 
 def draw_button(img, pos, key, size=50, rect_color=WHITE):
@@ -110,6 +102,105 @@ def draw_button(img, pos, key, size=50, rect_color=WHITE):
     return img
 
 
+def build_key_grid():
+    """Pixel -> index in KEY_LAYOUT (-1 outside keys) over the keyboard region."""
+    grid = np.full((KB_Y1 - KB_Y0, KB_X1 - KB_X0), -1, np.int16)
+    for i, (_, (x, y)) in enumerate(KEY_LAYOUT):
+        # Strictly inside the button, as in the old per-key comparison
+        grid[
+            y - KB_Y0 + 1 : y - KB_Y0 + BTN_SIZE, x - KB_X0 + 1 : x - KB_X0 + BTN_SIZE
+        ] = i
+    return grid
+
+
+KEY_GRID = build_key_grid()
+
+
+def key_at(x, y):
+    """Index of the key under (x, y) in constant time, or None."""
+    if KB_X0 <= x < KB_X1 and KB_Y0 <= y < KB_Y1:
+        key_idx = KEY_GRID[y - KB_Y0, x - KB_X0]
+        if key_idx >= 0:
+            return int(key_idx)
+    return None
+
+
+_KEYBOARD_LAYERS = {}
+
+
+def get_keyboard_layer(lowercase):
+    """Pre-rendered keyboard (pixels, mask) for one case, built on first use."""
+    if lowercase not in _KEYBOARD_LAYERS:
+        canvas = np.zeros((KB_Y1, KB_X1, 3), np.uint8)
+        mask = np.zeros((KB_Y1, KB_X1), np.uint8)
+        for key, pos in KEY_LAYOUT:
+            draw_button(canvas, pos, key.lower() if lowercase else key)
+            cv2.rectangle(
+                mask, pos, (pos[0] + BTN_SIZE, pos[1] + BTN_SIZE), 1, cv2.FILLED
+            )
+        _KEYBOARD_LAYERS[lowercase] = (canvas[KB_Y0:, KB_X0:], mask[KB_Y0:, KB_X0:])
+    return _KEYBOARD_LAYERS[lowercase]
+
+
+class DrawBoard:
+    """White board for display plus a sparse ink layer used for compositing.
+
+    The ink layer holds each stroke already multiplied by ``opacity`` and is
+    zero elsewhere, so blending is a saturating add limited to the dirty
+    rectangle around the strokes: the cost follows the drawn area, not the
+    frame size. Clearing resets only that rectangle, in place.
+    """
+
+    def __init__(self, width, height, opacity=0.2):
+        self.image = np.full((height, width, 3), 255, np.uint8)
+        self.ink = np.zeros((height, width, 3), np.uint8)
+        self.opacity = opacity
+        self.dirty = None  # (x0, y0, x1, y1) around the strokes since the last clear
+        self.version = 0
+
+    def _mark_dirty(self, x0, y0, x1, y1):
+        height, width = self.ink.shape[:2]
+        x0, y0, x1, y1 = max(x0, 0), max(y0, 0), min(x1, width), min(y1, height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if self.dirty is not None:
+            dx0, dy0, dx1, dy1 = self.dirty
+            x0, y0, x1, y1 = min(x0, dx0), min(y0, dy0), max(x1, dx1), max(y1, dy1)
+        self.dirty = (x0, y0, x1, y1)
+
+    def line(self, start, end, color, thickness):
+        cv2.line(self.image, start, end, color, thickness)
+        # A white brush erases: it removes ink instead of adding it
+        ink_color = BLACK if color == WHITE else tuple(c * self.opacity for c in color)
+        cv2.line(self.ink, start, end, ink_color, thickness)
+
+        margin = thickness // 2 + 2
+        self._mark_dirty(
+            min(start[0], end[0]) - margin,
+            min(start[1], end[1]) - margin,
+            max(start[0], end[0]) + margin + 1,
+            max(start[1], end[1]) + margin + 1,
+        )
+        self.version += 1
+
+    def clear(self):
+        if self.dirty is None:
+            return
+        x0, y0, x1, y1 = self.dirty
+        self.image[y0:y1, x0:x1] = 255
+        self.ink[y0:y1, x0:x1] = 0
+        self.dirty = None
+        self.version += 1
+
+    def composite(self, img):
+        """Blend the strokes into ``img`` in place."""
+        if self.dirty is not None:
+            x0, y0, x1, y1 = self.dirty
+            roi = img[y0:y1, x0:x1]
+            cv2.add(roi, self.ink[y0:y1, x0:x1], dst=roi)
+        return img
+
+
 class GestureController:
     def __init__(self):
         self.word_open = False
@@ -119,33 +210,31 @@ class GestureController:
         self.key_to_type = ""
         self.text = ">"
         self.keyboard = Controller()
-        self.draw_board = np.ones((RES_Y, RES_X, 3), np.uint8) * 255
+        self.board = DrawBoard(RES_X, RES_Y)
         self.brush_color = BLUE
         self.brush_thickness = 1
         self.last_x, self.last_y = 0, 0
 
-    def process_keyboard(self, img, hand_info, hand_fingers):
-        idx_x, idx_y, idx_z = hand_info["coords"][8]
+    def process_keyboard(self, img, hand_coords, hand_fingers):
+        idx_x, idx_y, idx_z = hand_coords[8].tolist()
         cv2.putText(img, "Press on -65 or lower", (850, 105), FONT, 0.6, BLACK, 1)
         cv2.putText(img, f"Distance: {idx_z}", (850, 130), FONT, 0.6, BLACK, 1)
 
-        for row_idx, row in enumerate(KEYS):
-            for col_idx, key in enumerate(row):
-                key_disp = key.lower() if sum(hand_fingers) <= 1 else key
-                pos = (
-                    OFFSET + col_idx * (BTN_SIZE + 30),
-                    OFFSET + row_idx * (BTN_SIZE + 30),
-                )
-                img = draw_button(img, pos, key_disp)
-
-                if (OFFSET + col_idx * 80) < idx_x < (100 + col_idx * 80) and (
-                    OFFSET + row_idx * 80
-                ) < idx_y < (100 + row_idx * 80):
-                    img = draw_button(img, pos, key_disp, rect_color=GREEN)
-                    if idx_z < -65:
-                        self.key_delay = 1
-                        self.key_to_type = key_disp
-                        img = draw_button(img, pos, key_disp, rect_color=LIGHT_BLUE)
+        # Teclado inteiro em uma única cópia; só a tecla sob o dedo é redesenhada
+        lowercase = hand_fingers.sum() <= 1
+        layer, mask = get_keyboard_layer(lowercase)
+        cv2.copyTo(layer, mask, img[KB_Y0:KB_Y1, KB_X0:KB_X1])
+
+        key_idx = key_at(idx_x, idx_y)
+        if key_idx is not None:
+            key, pos = KEY_LAYOUT[key_idx]
+            key_disp = key.lower() if lowercase else key
+            if idx_z < -65:
+                self.key_delay = 1
+                self.key_to_type = key_disp
+                img = draw_button(img, pos, key_disp, rect_color=LIGHT_BLUE)
+            else:
+                img = draw_button(img, pos, key_disp, rect_color=GREEN)
 
         if self.key_delay:
             self.key_delay += 1
@@ -154,7 +243,7 @@ class GestureController:
                 self.key_delay = 0
                 self.keyboard.press(self.key_to_type)
 
-        if hand_fingers == FINGER_4 and len(self.text) > 1:
+        if is_gesture(hand_fingers, FINGER_4) and len(self.text) > 1:
             self.text = self.text[:-1]
             self.keyboard.press(Key.backspace)
             sleep(0.15)
@@ -166,7 +255,7 @@ class GestureController:
         return img
 
     def process_instructions(self, img, hand_fingers):
-        if hand_fingers == FINGER_ALL:
+        if is_gesture(hand_fingers, FINGER_ALL):
             x0, y0, w, h = OFFSET, OFFSET, (RES_X - 200), (RES_Y - 200)
             cv2.rectangle(img, (x0, y0), (x0 + w, y0 + h), WHITE, cv2.FILLED)
             cv2.rectangle(img, (x0, y0), (x0 + w, y0 + h), BLUE, 1)
@@ -175,27 +264,26 @@ class GestureController:
         return img
 
     def process_app_launch(self, hand_fingers):
-        if hand_fingers == FINGER_1 and not self.word_open:
+        if is_gesture(hand_fingers, FINGER_1) and not self.word_open:
             self.word_open = True
             os.startfile(r"C:\Program Files\Microsoft Office\root\Office16\WINWORD.EXE")
-        elif hand_fingers == FINGER_1_2 and not self.excel_open:
+        elif is_gesture(hand_fingers, FINGER_1_2) and not self.excel_open:
             self.excel_open = True
             os.startfile(r"C:\Program Files\Microsoft Office\root\Office16\EXCEL.EXE")
-        elif hand_fingers == FINGER_1_2_3 and not self.firefox_open:
+        elif is_gesture(hand_fingers, FINGER_1_2_3) and not self.firefox_open:
             self.firefox_open = True
             os.startfile(r"C:\Program Files\Mozilla Firefox\firefox.exe")
-        elif hand_fingers == FINGER_NONE and self.firefox_open:
+        elif is_gesture(hand_fingers, FINGER_NONE) and self.firefox_open:
             self.firefox_open = False
             os.system("TASKKILL /IM firefox.exe")
-        return hand_fingers == FINGER_1_4
+        return is_gesture(hand_fingers, FINGER_1_4)
 
-    def process_drawing(self, img, hands_info):
-        hand1_fingers = fingers_up(hands_info[0])
-        hand2_fingers = fingers_up(hands_info[1])
-        idx_x, idx_y, idx_z = hands_info[0]["coords"][8]
+    def process_drawing(self, img, coords, fingers):
+        hand1_fingers, hand2_fingers = fingers[0], fingers[1]
+        idx_x, idx_y, idx_z = coords[0, 8].tolist()
 
         # Set brush color
-        fingers_up_count = sum(hand2_fingers)
+        fingers_up_count = hand2_fingers.sum()
         if fingers_up_count == 1:
             self.brush_color = BLUE
         elif fingers_up_count == 2:
@@ -205,7 +293,7 @@ class GestureController:
         elif fingers_up_count == 4:
             self.brush_color = WHITE
         elif fingers_up_count == 5:
-            self.draw_board = np.ones((RES_Y, RES_X, 3), np.uint8) * 255
+            self.board.clear()
 
         # Set brush thickness
         if idx_z < -60:
@@ -219,11 +307,10 @@ class GestureController:
             img, (idx_x, idx_y), self.brush_thickness, self.brush_color, cv2.FILLED
         )
 
-        if hand1_fingers == FINGER_1:
+        if is_gesture(hand1_fingers, FINGER_1):
             if self.last_x == 0 and self.last_y == 0:
                 self.last_x, self.last_y = idx_x, idx_y
-            cv2.line(
-                self.draw_board,
+            self.board.line(
                 (self.last_x, self.last_y),
                 (idx_x, idx_y),
                 self.brush_color,
@@ -233,8 +320,7 @@ class GestureController:
         else:
             self.last_x, self.last_y = 0, 0
 
-        img = cv2.addWeighted(img, 1, self.draw_board, 0.2, 0)
-        return img
+        return self.board.composite(img)
 
 
 def main():
@@ -242,42 +328,61 @@ def main():
     cap = cv2.VideoCapture(0)
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, RES_X)
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, RES_Y)
+    # A câmera pode entregar outra resolução; o layout do teclado usa RES_X x RES_Y
+    cam_size = (
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    )
+    print(f"Camera: {cam_size[0]}x{cam_size[1]}, display: {RES_X}x{RES_Y}")
+    cap = FrameSource(cap, latest_only=True)
 
     controller = GestureController()
+    board_version = -1
 
     while True:
         ret, img = cap.read()
         if not ret:
             break
 
+        if img.shape[1] != RES_X or img.shape[0] != RES_Y:
+            img = cv2.resize(img, (RES_X, RES_Y))
         img = cv2.flip(img, 1)
-        img, all_hands = get_hand_landmarks(img)
-
-        tip = "Raise right hand's fingers for instructions. Press 'ESC' to exit."
+        img, coords, sides = get_hand_landmarks(img)
+        fingers = fingers_up(coords, sides)
+
+        stats = tracker.stats()
+        tip = (
+            "Raise right hand's fingers for instructions. Press 'ESC' to exit."
+            f"   {stats['fps']:.0f} FPS, {stats['latency_ms']:.0f} ms"
+            f" @ {stats['detect_width']}px"
+        )
         cv2.rectangle(img, (0, 0), (RES_X, 30), WHITE, cv2.FILLED)
         cv2.rectangle(img, (0, 0), (RES_X, 30), BLUE, 1)
         cv2.putText(img, tip, (5, 20), FONT, 0.6, BLACK, 1)
 
-        if len(all_hands) == 1:
-            hand_info = all_hands[0]
-            hand_fingers = fingers_up(hand_info)
-            if hand_info["side"] == "Right":
-                img = controller.process_keyboard(img, hand_info, hand_fingers)
+        if len(coords) == 1:
+            hand_fingers = fingers[0]
+            if sides[0] == "Right":
+                img = controller.process_keyboard(img, coords[0], hand_fingers)
                 img = controller.process_instructions(img, hand_fingers)
-            elif hand_info["side"] == "Left":
+            elif sides[0] == "Left":
                 should_break = controller.process_app_launch(hand_fingers)
                 if should_break:
                     break
 
-        elif len(all_hands) == 2:
-            img = controller.process_drawing(img, all_hands)
+        elif len(coords) == 2:
+            img = controller.process_drawing(img, coords, fingers)
 
         cv2.imshow("Image", img)
-        cv2.imshow("Board", controller.draw_board)
+        # The board window is refreshed only when a stroke changed it
+        if controller.board.version != board_version:
+            board_version = controller.board.version
+            cv2.imshow("Board", controller.board.image)
 
         if cv2.waitKey(1) == 27:
             break
 
+    cap.release()
     results_dir = os.path.join(
         os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "results"
     )
@@ -285,7 +390,7 @@ def main():
     with open(os.path.join(results_dir, "text.txt"), "w") as f:
         f.write(controller.text)
 
-    cv2.imwrite(os.path.join(results_dir, "board.png"), controller.draw_board)
+    cv2.imwrite(os.path.join(results_dir, "board.png"), controller.board.image)
 
 
 if __name__ == "__main__":
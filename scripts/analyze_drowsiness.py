@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import sys
+
+# Make the app's utils/ importable when run as a script (spawned workers
+# inherit this sys.path)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "streamlit_app"))
+
+from utils.drowsiness import analyze_videos  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Offline fatigue analysis (EAR/MAR/blinks) of recorded driver videos."
+    )
+    parser.add_argument("videos", nargs="+", help="Video files to analyse.")
+    parser.add_argument("--output-dir", default="drowsiness_results")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--every-k", type=int, default=1, help="Analyse only every k-th frame."
+    )
+    parser.add_argument("--ear-threshold", type=float, default=0.25)
+    parser.add_argument("--mar-threshold", type=float, default=0.55)
+    parser.add_argument("--closed-frames", type=int, default=20)
+    parser.add_argument(
+        "--backend",
+        choices=["solutions", "tasks"],
+        default="solutions",
+        help="MediaPipe solutions FaceMesh or the Tasks FaceLandmarker.",
+    )
+    args = parser.parse_args()
+
+    summaries = analyze_videos(
+        args.videos,
+        args.output_dir,
+        workers=args.workers,
+        every_k=args.every_k,
+        ear_threshold=args.ear_threshold,
+        mar_threshold=args.mar_threshold,
+        closed_frames_threshold=args.closed_frames,
+        backend=args.backend,
+    )
+    for s in summaries:
+        print(
+            f"{s['video']}: {s['samples']} samples, {s['blinks']} blinks, "
+            f"{s['alert_episodes']} alerts, {s['yawns']} yawns -> {s['output']}"
+        )
+
+    summary_path = f"{args.output_dir}/summary.json"
+    with open(summary_path, "w") as f:
+        json.dump(summaries, f, indent=2)
+    print(f"Saved summary to {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+# Make the app's utils/ importable when run as a script (spawned workers
+# inherit this sys.path)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "streamlit_app"))
+
+from utils.traffic import (  # noqa: E402
+    PARALLEL_ALGORITHMS,
+    MorphologyPipeline,
+    VehicleCounter,
+    count_video_parallel,
+    iter_frames,
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ALGORITHMS = ["MOG2", "KNN", "GMG", "CNT", "MOG"]
+FILTERS = ["none", "closing", "opening", "dilation", "combine"]
+MORPHOLOGY_MODES = MorphologyPipeline.MODES
+# Accepted relative difference between parallel and sequential counts for
+# PARALLEL_ALGORITHMS (GMG counted 201 vs 200 on a 2436-frame recording in 4
+# segments). The other algorithms must fall back to one sequential run
+PARALLEL_TOLERANCE = 0.02
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+def benchmark_run(
+    video_path,
+    algorithm,
+    filter_type,
+    max_frames=None,
+    scale=1.0,
+    morphology_mode="exact",
+):
+    """Count one video with one configuration and time every frame.
+
+    ``processing_fps`` and the latencies cover ``counter.process`` only;
+    ``wall_fps`` also includes decoding, i.e. the rate of a whole run.
+    """
+    counter = VehicleCounter(
+        algorithm,
+        filter_type=filter_type,
+        scale=scale,
+        morphology_mode=morphology_mode,
+    )
+    latencies = []
+    wall_start = time.perf_counter()
+    for frame in iter_frames(video_path):
+        if max_frames is not None and len(latencies) >= max_frames:
+            break
+        start = time.perf_counter()
+        counter.process(frame)
+        latencies.append(time.perf_counter() - start)
+    wall = time.perf_counter() - wall_start
+
+    latencies = np.array(latencies) * 1000.0
+    total = latencies.sum() / 1000.0
+    return {
+        "algorithm": algorithm,
+        "filter": filter_type,
+        "morphology": morphology_mode if filter_type == "combine" else None,
+        "scale": scale,
+        "frames": len(latencies),
+        "count": counter.vehicle_count,
+        "latency_ms": {
+            f"p{p}": round(float(np.percentile(latencies, p)), 3) if total else None
+            for p in (50, 90, 99)
+        },
+        "processing_fps": round(len(latencies) / total, 2) if total else None,
+        "wall_fps": round(len(latencies) / wall, 2) if latencies.size else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_parallel(video_path, algorithm, workers=None, scale=1.0):
+    """Count a video sequentially and with ``count_video_parallel``, timing both.
+
+    ``passed`` is False when a parallel-safe algorithm diverges by more than
+    ``PARALLEL_TOLERANCE``, or when any other one was split across workers
+    or does not give exactly the sequential count.
+    """
+    start = time.perf_counter()
+    sequential = VehicleCounter(algorithm, scale=scale).run(
+        video_path, keep_events=False
+    )
+    middle = time.perf_counter()
+    parallel = count_video_parallel(
+        video_path, workers=workers, algorithm_type=algorithm, scale=scale
+    )
+    end = time.perf_counter()
+
+    divergence = abs(parallel["count"] - sequential["count"]) / max(
+        1, sequential["count"]
+    )
+    if algorithm in PARALLEL_ALGORITHMS:
+        passed = divergence <= PARALLEL_TOLERANCE
+    else:
+        passed = parallel["workers"] == 1 and divergence == 0
+    return {
+        "algorithm": algorithm,
+        "sequential_count": sequential["count"],
+        "parallel_count": parallel["count"],
+        "workers": parallel["workers"],
+        "divergence": round(divergence, 4),
+        "passed": passed,
+        "sequential_s": round(middle - start, 2),
+        "parallel_s": round(end - middle, 2),
+    }
+
+
+def load_expected_count(labels_path, video_path):
+    """Read the true count from a JSON file ({"video.mp4": 42}) or a bare integer."""
+    with open(labels_path) as f:
+        labels = json.load(f)
+    if isinstance(labels, dict):
+        return labels.get(os.path.basename(video_path))
+    return int(labels)
+
+
+def run_benchmark(
+    video_path,
+    algorithms=ALGORITHMS,
+    filters=FILTERS,
+    max_frames=None,
+    scale=1.0,
+    labels_path=None,
+    morphology_modes=("exact",),
+    check_parallel=False,
+    workers=None,
+):
+    """Benchmark every algorithm/filter pair, each in a fresh process.
+
+    Running each configuration in its own process keeps peak RSS figures
+    independent and stops one run's caches from warming up the next. The
+    "combine" filter runs once per entry of ``morphology_modes``. With
+    ``check_parallel`` every algorithm is also counted with
+    ``count_video_parallel`` and compared with the sequential count.
+    """
+    expected = load_expected_count(labels_path, video_path) if labels_path else None
+    context = multiprocessing.get_context("spawn")
+
+    configs = [
+        (filter_type, mode)
+        for filter_type in filters
+        for mode in (morphology_modes if filter_type == "combine" else ["exact"])
+    ]
+    results = []
+    for algorithm in algorithms:
+        for filter_type, mode in configs:
+            print(f"Benchmarking {algorithm} + {filter_type} ({mode})...")
+            with context.Pool(1) as pool:
+                result = pool.apply(
+                    benchmark_run,
+                    (video_path, algorithm, filter_type, max_frames, scale, mode),
+                )
+            if expected is not None:
+                result["expected_count"] = expected
+                result["count_error"] = result["count"] - expected
+                result["relative_error"] = (
+                    round(abs(result["count_error"]) / expected, 4)
+                    if expected
+                    else None
+                )
+            results.append(result)
+
+    parallel = []
+    if check_parallel:
+        for algorithm in algorithms:
+            print(f"Comparing parallel and sequential counts for {algorithm}...")
+            parallel.append(compare_parallel(video_path, algorithm, workers, scale))
+
+    return {
+        "video": os.path.basename(video_path),
+        "max_frames": max_frames,
+        "cpu_count": os.cpu_count(),
+        "results": results,
+        "parallel": parallel,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark background subtractors and morphology filters."
+    )
+    parser.add_argument("video", help="Video file to analyse.")
+    parser.add_argument("--algorithms", nargs="+", default=ALGORITHMS)
+    parser.add_argument("--filters", nargs="+", default=FILTERS)
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--labels", help="JSON file with the true vehicle count.")
+    parser.add_argument(
+        "--morphology",
+        nargs="+",
+        choices=MORPHOLOGY_MODES,
+        default=["exact"],
+        help="MorphologyPipeline modes to run with the combine filter.",
+    )
+    parser.add_argument(
+        "--check-parallel",
+        action="store_true",
+        help="Also compare count_video_parallel with the sequential count.",
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="traffic_benchmark.json")
+    args = parser.parse_args()
+
+    report = run_benchmark(
+        args.video,
+        algorithms=args.algorithms,
+        filters=args.filters,
+        max_frames=args.max_frames,
+        scale=args.scale,
+        labels_path=args.labels,
+        morphology_modes=args.morphology,
+        check_parallel=args.check_parallel,
+        workers=args.workers,
+    )
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for r in report["results"]:
+        print(
+            f"{r['algorithm']:>5} {r['filter']:>9} {r['morphology'] or '':>6}: "
+            f"p50 {r['latency_ms']['p50']} ms, {r['processing_fps']} fps processing, "
+            f"{r['wall_fps']} fps with decoding, "
+            f"count {r['count']}"
+        )
+    for r in report["parallel"]:
+        print(
+            f"{r['algorithm']:>5} parallel: count {r['parallel_count']} vs "
+            f"{r['sequential_count']} sequential ({r['divergence']:.1%}, "
+            f"{r['workers']} workers, {r['parallel_s']} s vs {r['sequential_s']} s)"
+            f"{'' if r['passed'] else ' FAILED'}"
+        )
+    print(f"Saved report to {args.output}")
+
+    if not all(r["passed"] for r in report["parallel"]):
+        print("count_video_parallel does not match the sequential counts")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+
+from PIL import Image, ImageSequence
+
+# Make the app's utils/ importable when run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "streamlit_app"))
+
+from utils.config import (  # noqa: E402
+    DEMO_CLASSIFICATION,
+    DEMO_DROWSINESS,
+    DEMO_TRACKING,
+    DEMO_TRAFFIC,
+    IMG_PREVIEW_CLASSIFICATION,
+    IMG_PREVIEW_DROWSINESS,
+    IMG_PREVIEW_TRACKING,
+    IMG_PREVIEW_TRAFFIC,
+    MEDIA_MANIFEST,
+    STATIC_MEDIA_DIR,
+)
+from utils.media import manifest_key  # noqa: E402
+
+# Dashboard cards are 250 px high at half the page width
+PREVIEWS = [
+    IMG_PREVIEW_CLASSIFICATION,
+    IMG_PREVIEW_TRAFFIC,
+    IMG_PREVIEW_TRACKING,
+    IMG_PREVIEW_DROWSINESS,
+]
+ANIMATIONS = [DEMO_CLASSIFICATION, DEMO_TRAFFIC, DEMO_TRACKING, DEMO_DROWSINESS]
+
+
+def encode_preview(path, max_width, max_bytes):
+    """Progressive JPEG no wider than ``max_width``, quality lowered to fit ``max_bytes``."""
+    img = Image.open(path).convert("RGB")
+    img.thumbnail((max_width, max_width * 4))
+    for quality in (85, 75, 65, 55, 45, 35):
+        buffer = io.BytesIO()
+        img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True)
+        if buffer.tell() <= max_bytes:
+            break
+    return buffer.getvalue()
+
+
+def encode_animation(path, max_width, max_bytes):
+    """Animated WebP of a GIF, dropping quality and then frames to fit ``max_bytes``."""
+    gif = Image.open(path)
+    frames, durations = [], []
+    for frame in ImageSequence.Iterator(gif):
+        frame = frame.convert("RGB")
+        frame.thumbnail((max_width, max_width * 4))
+        frames.append(frame)
+        durations.append(frame.info.get("duration", gif.info.get("duration", 100)))
+
+    for step in (1, 2, 3):
+        # Keep every step-th frame, each shown as long as the frames it replaces
+        kept = frames[::step]
+        kept_durations = [
+            sum(durations[i : i + step]) for i in range(0, len(frames), step)
+        ]
+        for quality in (75, 60, 45):
+            buffer = io.BytesIO()
+            kept[0].save(
+                buffer,
+                "WEBP",
+                save_all=True,
+                append_images=kept[1:],
+                duration=kept_durations,
+                loop=0,
+                quality=quality,
+                method=4,
+            )
+            if buffer.tell() <= max_bytes:
+                return buffer.getvalue()
+    return buffer.getvalue()
+
+
+def build_media(preview_width, preview_bytes, animation_width, animation_bytes):
+    """Write every built file to STATIC_MEDIA_DIR and index them in the manifest."""
+    os.makedirs(STATIC_MEDIA_DIR, exist_ok=True)
+    jobs = [
+        (path, ".jpg", lambda p: encode_preview(p, preview_width, preview_bytes))
+        for path in PREVIEWS
+    ] + [
+        (path, ".webp", lambda p: encode_animation(p, animation_width, animation_bytes))
+        for path in ANIMATIONS
+    ]
+
+    manifest = {}
+    for path, ext, encode in jobs:
+        if not os.path.exists(path):
+            print(f"Skipping {path} (not found)")
+            continue
+        data = encode(path)
+        name = os.path.splitext(os.path.basename(path))[0] + ext
+        with open(STATIC_MEDIA_DIR / name, "wb") as f:
+            f.write(data)
+
+        source_bytes = os.path.getsize(path)
+        manifest[manifest_key(path)] = {
+            "file": name,
+            "hash": hashlib.sha1(data).hexdigest()[:12],
+            "bytes": len(data),
+            "source_bytes": source_bytes,
+        }
+        print(
+            f"{path}: {source_bytes / 1024:.0f} KB -> {name} {len(data) / 1024:.0f} KB"
+        )
+
+    with open(MEDIA_MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Saved manifest to {MEDIA_MANIFEST}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build size-budgeted previews and animated WebP demos for static serving."
+    )
+    parser.add_argument("--preview-width", type=int, default=640)
+    parser.add_argument("--preview-kb", type=int, default=60)
+    parser.add_argument("--animation-width", type=int, default=560)
+    parser.add_argument("--animation-kb", type=int, default=1200)
+    args = parser.parse_args()
+
+    build_media(
+        args.preview_width,
+        args.preview_kb * 1024,
+        args.animation_width,
+        args.animation_kb * 1024,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = ["tensorflow", "mediapipe"]
+
+PAGES = [
+    "Painel.py",
+    "pages/1_Image_Classification.py",
+    "pages/2_Traffic_Analysis.py",
+    "pages/3_Human_Machine_Interaction.py",
+    "pages/4_Road_Safety.py",
+]
+
+# Renders one page headless (default widget state, no buttons pressed) in a
+# fresh interpreter and reports how long it took and which frameworks loaded.
+PROFILE_CODE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+start = time.perf_counter()
+app = AppTest.from_file({page!r}, default_timeout=300).run()
+print(json.dumps({{
+    "seconds": round(time.perf_counter() - start, 2),
+    "exceptions": [e.value for e in app.exception],
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def profile_page(app_dir, page):
+    """Render ``page`` in a subprocess and return its import-time profile."""
+    result = subprocess.run(
+        [sys.executable, "-c", PROFILE_CODE.format(page=page, heavy=HEAVY_MODULES)],
+        cwd=app_dir,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    app_dir = os.path.join(project_root, "streamlit_app")
+
+    failed = False
+    for page in PAGES:
+        profile = profile_page(app_dir, page)
+        print(f"{page}: {profile}")
+        if profile.get("error") or profile.get("heavy_modules"):
+            failed = True
+
+    if failed:
+        print(
+            "\nSome pages load ML frameworks (or fail) before inference is requested."
+        )
+        sys.exit(1)
+    print("\nAll pages render without loading ML frameworks.")
+
+
+if __name__ == "__main__":
+    main()
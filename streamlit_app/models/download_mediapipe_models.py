@@ -0,0 +1,29 @@
+import os
+import urllib.request
+
+# Official float16 bundles for the MediaPipe Tasks landmarkers
+MODEL_URLS = {
+    "hand_landmarker.task": "https://storage.googleapis.com/mediapipe-models/hand_landmarker/hand_landmarker/float16/latest/hand_landmarker.task",
+    "face_landmarker.task": "https://storage.googleapis.com/mediapipe-models/face_landmarker/face_landmarker/float16/latest/face_landmarker.task",
+}
+
+
+def download_models(output_dir, overwrite=False):
+    """Fetch the Tasks model bundles used by the "tasks" landmark backend."""
+    for name, url in MODEL_URLS.items():
+        model_path = os.path.join(output_dir, name)
+        if os.path.exists(model_path) and not overwrite:
+            print(f"{model_path} already exists, skipping")
+            continue
+        print(f"Downloading {url} ...")
+        urllib.request.urlretrieve(url, model_path)
+        size_kb = os.path.getsize(model_path) / 1024
+        print(f"Saved {model_path} ({size_kb:.1f} KB)")
+
+
+def main():
+    download_models(os.path.dirname(os.path.abspath(__file__)))
+
+
+if __name__ == "__main__":
+    main()
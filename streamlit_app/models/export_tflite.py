@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras import datasets
+
+# Make utils/ importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.inference import TFLiteClassifier  # noqa: E402
+
+
+def representative_dataset(images, num_samples=500):
+    """Yield calibration batches for full-integer quantization."""
+    rng = np.random.default_rng(0)
+    for idx in rng.choice(
+        len(images), size=min(num_samples, len(images)), replace=False
+    ):
+        yield [images[idx : idx + 1].astype(np.float32) / 255.0]
+
+
+def convert_model(model, precision, calibration_images=None):
+    """Convert a Keras model to TFLite bytes with post-training quantization."""
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if precision == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif precision == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: representative_dataset(
+            calibration_images
+        )
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def keras_accuracy(model, x_test, y_test):
+    probs = model.predict(x_test.astype(np.float32) / 255.0, batch_size=256, verbose=0)
+    return float(np.mean(np.argmax(probs, axis=1) == y_test.ravel()))
+
+
+def tflite_accuracy(model_path, x_test, y_test, batch_size=256):
+    classifier = TFLiteClassifier(model_path)
+    correct = 0
+    for start in range(0, len(x_test), batch_size):
+        batch = x_test[start : start + batch_size].astype(np.float32) / 255.0
+        probs = classifier(batch)
+        correct += np.sum(
+            np.argmax(probs, axis=1) == y_test[start : start + batch_size].ravel()
+        )
+    return float(correct / len(x_test))
+
+
+def export_tflite_models(model, x_calibration, x_test, y_test, output_dir):
+    """Write float16 and int8 TFLite models plus an accuracy report next to the .h5."""
+    report = {"keras_accuracy": keras_accuracy(model, x_test, y_test)}
+    print(f"Keras accuracy: {report['keras_accuracy']:.4f}")
+
+    for precision in ["float16", "int8"]:
+        print(f"Converting to TFLite ({precision})...")
+        tflite_bytes = convert_model(model, precision, x_calibration)
+        model_path = os.path.join(output_dir, f"cifar10_cnn_{precision}.tflite")
+        with open(model_path, "wb") as f:
+            f.write(tflite_bytes)
+
+        accuracy = tflite_accuracy(model_path, x_test, y_test)
+        report[precision] = {
+            "path": os.path.basename(model_path),
+            "size_kb": round(len(tflite_bytes) / 1024, 1),
+            "accuracy": accuracy,
+            "accuracy_delta": accuracy - report["keras_accuracy"],
+        }
+        print(
+            f"Saved {model_path} ({report[precision]['size_kb']} KB), "
+            f"accuracy {accuracy:.4f} ({report[precision]['accuracy_delta']:+.4f})"
+        )
+
+    report_path = os.path.join(output_dir, "cifar10_tflite_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved report to {report_path}")
+    return report
+
+
+def main():
+    output_dir = os.path.dirname(os.path.abspath(__file__))
+    model_path = os.path.join(output_dir, "cifar10_cnn.h5")
+
+    print(f"Loading {model_path} ...")
+    model = tf.keras.models.load_model(model_path)
+
+    print("Loading CIFAR-10 data...")
+    (x_train, _), (x_test, y_test) = datasets.cifar10.load_data()
+
+    export_tflite_models(model, x_train, x_test, y_test, output_dir)
+
+
+if __name__ == "__main__":
+    main()
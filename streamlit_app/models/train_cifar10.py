@@ -1,5 +1,15 @@
+import argparse
+import json
 import os
-from tensorflow.keras import datasets, layers, models
+import socket
+import subprocess
+import sys
+import time
+
+import tensorflow as tf
+from tensorflow.keras import callbacks, datasets, layers, models
+
+from export_tflite import export_tflite_models
 
 
 def build_model(input_shape, num_classes):
@@ -15,19 +25,209 @@ def build_model(input_shape, num_classes):
             layers.MaxPooling2D((2, 2)),
             layers.Flatten(),
             layers.Dense(64, activation="relu"),
-            layers.Dense(num_classes, activation="softmax"),
+            # Softmax kept in float32 so mixed precision stays numerically stable
+            layers.Dense(num_classes, activation="softmax", dtype="float32"),
         ]
     )
     return model
 
 
+def augment_image(image, label):
+    """Random horizontal flip and a 4-pixel padded random crop (uint8)."""
+    image = tf.image.random_flip_left_right(image)
+    image = tf.image.pad_to_bounding_box(image, 4, 4, 40, 40)
+    image = tf.image.random_crop(image, (32, 32, 3))
+    return image, label
+
+
+def normalize_batch(images, labels):
+    """Scale a uint8 batch to float32 in [0, 1] on the fly."""
+    return tf.cast(images, tf.float32) / 255.0, labels
+
+
+def make_dataset(
+    images, labels, batch_size=64, training=False, augment=False, cache=True
+):
+    """Stream uint8 arrays through tf.data instead of materialising float copies.
+
+    Images stay uint8 until a batch is normalized to float32, so memory holds
+    one float batch at a time rather than the float64 dataset.
+    """
+    ds = tf.data.Dataset.from_tensor_slices((images, labels))
+    if cache:
+        ds = ds.cache()
+    if training:
+        ds = ds.shuffle(10000, reshuffle_each_iteration=True)
+    if augment:
+        ds = ds.map(augment_image, num_parallel_calls=tf.data.AUTOTUNE)
+    ds = ds.batch(batch_size)
+    ds = ds.map(normalize_batch, num_parallel_calls=tf.data.AUTOTUNE)
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+
+class ThroughputCallback(callbacks.Callback):
+    """Print training images/sec at the end of every epoch.
+
+    Only the training batches are timed; the validation pass that ``fit``
+    runs at the end of the epoch is timed and reported separately.
+    """
+
+    def __init__(self, num_images):
+        super().__init__()
+        self.num_images = num_images
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_start = time.perf_counter()
+        self.train_end = None
+        self.val_seconds = 0.0
+
+    def on_test_begin(self, logs=None):
+        self.test_start = time.perf_counter()
+        if self.train_end is None:
+            self.train_end = self.test_start
+
+    def on_test_end(self, logs=None):
+        self.val_seconds += time.perf_counter() - self.test_start
+
+    def on_epoch_end(self, epoch, logs=None):
+        train_end = self.train_end or time.perf_counter()
+        images_per_sec = self.num_images / (train_end - self.epoch_start)
+        if logs is not None:
+            logs["images_per_sec"] = images_per_sec
+            logs["validation_seconds"] = self.val_seconds
+        print(
+            f" - {images_per_sec:.0f} images/sec"
+            f" (validation {self.val_seconds:.1f} s)"
+        )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the CIFAR-10 CNN.")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument(
+        "--batch-size", type=int, default=64, help="Batch size per replica."
+    )
+    parser.add_argument(
+        "--augment", action="store_true", help="Random flips and crops."
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Disable tf.data caching."
+    )
+    parser.add_argument(
+        "--strategy",
+        choices=["default", "mirrored", "multiworker"],
+        default="default",
+        help="tf.distribute strategy (multiworker reads the cluster from TF_CONFIG).",
+    )
+    parser.add_argument(
+        "--simulate-workers",
+        type=int,
+        default=0,
+        help="Launch N local processes as a multi-worker CPU cluster.",
+    )
+    parser.add_argument(
+        "--mixed-precision",
+        action="store_true",
+        help="Use mixed_float16 when a GPU supports it.",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "checkpoints"),
+        help="Where epoch checkpoints are kept; training resumes from them.",
+    )
+    return parser.parse_args()
+
+
+def get_strategy(name):
+    if name == "mirrored":
+        return tf.distribute.MirroredStrategy()
+    if name == "multiworker":
+        return tf.distribute.MultiWorkerMirroredStrategy()
+    return tf.distribute.get_strategy()
+
+
+def enable_mixed_precision():
+    """Switch to mixed_float16 if a GPU is present; CPUs keep float32."""
+    if not tf.config.list_physical_devices("GPU"):
+        print("No GPU found, mixed precision disabled (float32).")
+        return False
+
+    tf.keras.mixed_precision.set_global_policy("mixed_float16")
+    print("Mixed precision enabled (mixed_float16).")
+    return True
+
+
+def is_chief():
+    """Only the chief (or worker 0) saves and exports the final model."""
+    task = json.loads(os.environ.get("TF_CONFIG", "{}")).get("task", {})
+    return task.get("type", "chief") == "chief" or (
+        task.get("type") == "worker" and task.get("index", 0) == 0
+    )
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def launch_local_cluster(num_workers, args):
+    """Run this script once per worker with a localhost TF_CONFIG and wait."""
+    workers = [f"localhost:{_free_port()}" for _ in range(num_workers)]
+    argv = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--epochs",
+        str(args.epochs),
+        "--batch-size",
+        str(args.batch_size),
+        "--strategy",
+        "multiworker",
+        "--checkpoint-dir",
+        args.checkpoint_dir,
+    ]
+    argv += ["--augment"] if args.augment else []
+    argv += ["--no-cache"] if args.no_cache else []
+    argv += ["--mixed-precision"] if args.mixed_precision else []
+
+    processes = []
+    for index in range(num_workers):
+        tf_config = {
+            "cluster": {"worker": workers},
+            "task": {"type": "worker", "index": index},
+        }
+        env = dict(os.environ, TF_CONFIG=json.dumps(tf_config))
+        processes.append(subprocess.Popen(argv, env=env))
+    return max(process.wait() for process in processes)
+
+
 def main():
+    args = parse_args()
+
+    if args.simulate_workers > 1:
+        print(f"Launching {args.simulate_workers} local workers...")
+        sys.exit(launch_local_cluster(args.simulate_workers, args))
+
+    mixed_precision = args.mixed_precision and enable_mixed_precision()
+    strategy = get_strategy(args.strategy)
+    global_batch_size = args.batch_size * strategy.num_replicas_in_sync
+    print(f"Replicas in sync: {strategy.num_replicas_in_sync}")
+
     print("Loading CIFAR-10 data...")
-    (x_train, y_train), (x_test, y_test) = datasets.cifar10.load_data()
+    (x_train_raw, y_train), (x_test_raw, y_test) = datasets.cifar10.load_data()
 
-    print("Normalizing images...")
-    x_train = x_train / 255.0
-    x_test = x_test / 255.0
+    print("Building tf.data pipelines...")
+    train_ds = make_dataset(
+        x_train_raw,
+        y_train,
+        batch_size=global_batch_size,
+        training=True,
+        augment=args.augment,
+        cache=not args.no_cache,
+    )
+    test_ds = make_dataset(
+        x_test_raw, y_test, batch_size=global_batch_size, cache=not args.no_cache
+    )
 
     classification_names = [
         "airplane",
@@ -43,26 +243,50 @@ def main():
     ]
 
     print("Building model...")
-    model = build_model((32, 32, 3), len(classification_names))
-
-    model.compile(
-        optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"]
-    )
+    with strategy.scope():
+        model = build_model((32, 32, 3), len(classification_names))
+        model.compile(
+            optimizer="adam",
+            loss="sparse_categorical_crossentropy",
+            metrics=["accuracy"],
+        )
 
     print("Training model (this will take some time)...")
-    # Using fewer epochs for demonstration if needed, but keeping original 10
-    model.fit(x_train, y_train, epochs=10, validation_data=(x_test, y_test))
+    # BackupAndRestore resumes from the last finished epoch after an interruption
+    model.fit(
+        train_ds,
+        epochs=args.epochs,
+        validation_data=test_ds,
+        callbacks=[
+            callbacks.BackupAndRestore(args.checkpoint_dir),
+            ThroughputCallback(len(x_train_raw)),
+        ],
+    )
 
     print("Evaluating model...")
-    loss, accuracy = model.evaluate(x_test, y_test, verbose=2)
+    loss, accuracy = model.evaluate(test_ds, verbose=2)
     print(f"Test Accuracy: {accuracy}")
 
+    # Save a plain float32 copy outside the strategy: no collective ops on
+    # export, and CPU pods never run float16 kernels
+    if mixed_precision:
+        tf.keras.mixed_precision.set_global_policy("float32")
+    trained_weights = model.get_weights()
+    model = build_model((32, 32, 3), len(classification_names))
+    model.set_weights(trained_weights)
+
+    if not is_chief():
+        return
+
     # Determine safe output path
     output_dir = os.path.dirname(os.path.abspath(__file__))
     output_path = os.path.join(output_dir, "cifar10_cnn.h5")
 
     print(f"Saving model to {output_path} ...")
     model.save(output_path)
+
+    print("Exporting quantized TFLite models...")
+    export_tflite_models(model, x_train_raw, x_test_raw, y_test, output_dir)
     print("Optimization complete!")
 
 
@@ -6,9 +6,15 @@ from PIL import ImageOps
 from utils.ui import (
     configure_page,
     render_sidebar_info,
-    get_image_base64,
+    render_demo,
 )
-from utils.loader import load_cifar10_model, get_cifar10_class_names
+from utils.loader import (
+    get_inference_service,
+    get_cifar10_backends,
+    get_cifar10_class_names,
+    get_tflite_report,
+)
+from utils.inference import preprocess_image
 from utils.config import IMG_CIFAR10_CLASSES, DEMO_CLASSIFICATION, IMG_CIFAR10_EXAMPLES
 
 configure_page("Image Classification", "🖼️")
@@ -39,11 +45,7 @@ with tab1:
     with col2:
         st.markdown("### Demo")
 
-        gif_b64 = get_image_base64(DEMO_CLASSIFICATION)
-        st.markdown(
-            f'<img src="{gif_b64}" width="100%" style="border-radius: 8px;">',
-            unsafe_allow_html=True,
-        )
+        render_demo(DEMO_CLASSIFICATION)
 
 with tab2:
     st.markdown("### Example Classifications")
@@ -51,19 +53,39 @@ with tab2:
         "Here are some sample images from our dataset and how the model classifies them."
     )
 
-    model = load_cifar10_model()
     class_names = get_cifar10_class_names()
 
-    if model is None:
+    # Loading the model imports TensorFlow, so it only happens on request
+    show_examples = st.toggle("Run the model on the examples")
+    service = get_inference_service() if show_examples else None
+
+    if not show_examples:
+        st.caption("Enable the toggle above to load the model.")
+    elif service is None:
         st.error("Model not found. Please train and save it first.")
     else:
+        import os
+
+        # Classify all examples in one batch (cached across reruns)
+        examples = {
+            path: Image.open(path)
+            for path in IMG_CIFAR10_EXAMPLES
+            if os.path.exists(path)
+        }
+        example_preds = dict(
+            zip(
+                examples,
+                service.predict_many(
+                    [preprocess_image(img) for img in examples.values()]
+                ),
+            )
+        )
+
         cols = st.columns(3)
         for i, img_path in enumerate(IMG_CIFAR10_EXAMPLES):
             with cols[i]:
-                import os
-
-                if os.path.exists(img_path):
-                    img = Image.open(img_path)
+                if img_path in examples:
+                    img = examples[img_path]
 
                     # Ensure consistent display size (crop to 400x300)
                     img_display = ImageOps.fit(
@@ -71,15 +93,7 @@ with tab2:
                     )
                     st.image(img_display, use_column_width=True)
 
-                    # Pre-process
-                    img_resized = img.resize((32, 32))
-                    if img_resized.mode != "RGB":
-                        img_resized = img_resized.convert("RGB")
-                    img_array = np.array(img_resized) / 255.0
-                    img_array = np.expand_dims(img_array, axis=0)
-
-                    # Predict
-                    preds = model.predict(img_array, verbose=0)[0]
+                    preds = example_preds[img_path]
                     pred_idx = np.argmax(preds)
                     confidence = preds[pred_idx] * 100
 
@@ -118,6 +132,20 @@ with tab3:
         input_method = st.radio(
             "Select Input Method:", ["Upload Image", "Use Camera"], horizontal=True
         )
+        backends = get_cifar10_backends() or ["keras"]
+        backend = st.radio(
+            "Inference Backend:",
+            backends,
+            format_func=lambda b: "Keras (.h5)" if b == "keras" else f"TFLite {b}",
+            horizontal=True,
+        )
+        report = get_tflite_report()
+        if report and backend in report:
+            st.caption(
+                f"{report[backend]['size_kb']} KB, accuracy "
+                f"{report[backend]['accuracy']:.1%} "
+                f"({report[backend]['accuracy_delta']:+.2%} vs. Keras)"
+            )
     with col2:
         image_file = None
         if input_method == "Upload Image":
@@ -131,13 +159,13 @@ with tab3:
 
     col3, col4 = st.columns([2, 1])
 
-    model = load_cifar10_model()
+    service = get_inference_service(backend) if image_file is not None else None
 
-    if model is None:
+    if image_file is not None and service is None:
         st.error(
             "Error: The pre-trained Keras model (cifar10_cnn.h5) was not found. Please train and save the model first."
         )
-    elif image_file is not None:
+    elif service is not None:
         # Display the uploaded image
         image = Image.open(image_file)
 
@@ -146,17 +174,10 @@ with tab3:
         with col4:
             # Pre-process image for CIFAR-10 model
             with st.spinner("Analyzing image features..."):
-                img_resized = image.resize((32, 32))
-
-                # Ensure image is RGB
-                if img_resized.mode != "RGB":
-                    img_resized = img_resized.convert("RGB")
-
-                image_array = np.array(img_resized) / 255.0
-                image_array = np.expand_dims(image_array, axis=0)  # Add batch dimension
+                image_array = preprocess_image(image)
 
-                # Run inference
-                predictions = model.predict(image_array)[0]
+                # Run inference (batched with concurrent sessions, cached by content)
+                predictions = service.predict(image_array)
                 class_names = get_cifar10_class_names()
 
                 # Get top prediction
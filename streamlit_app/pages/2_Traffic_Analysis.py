@@ -1,8 +1,15 @@
 import streamlit as st
 import cv2
 from PIL import Image
-from utils.ui import configure_page, render_sidebar_info, get_image_base64
-from utils.traffic import get_subtractor, apply_filter, get_centroid, save_uploaded_file
+from utils.ui import configure_page, render_sidebar_info, render_demo
+from utils.traffic import (
+    VehicleCounter,
+    draw_detections,
+    line_band,
+    save_uploaded_file,
+)
+from utils.video import FrameSource
+from utils.scheduler import StreamScheduler
 from utils.config import (
     DEMO_TRAFFIC,
     IMG_TRAFFIC_ORIGINAL,
@@ -10,6 +17,15 @@ from utils.config import (
     VIDEO_TRAFFIC_DEFAULT,
 )
 
+
+@st.cache_resource(show_spinner=False)
+def get_stream_scheduler():
+    """One scheduler per server process, shared by every browser session."""
+    scheduler = StreamScheduler()
+    scheduler.start()
+    return scheduler
+
+
 configure_page("Traffic Analysis", "🚗")
 render_sidebar_info()
 
@@ -18,7 +34,9 @@ st.markdown(
     "Automated traffic flow monitoring and vehicle counting using OpenCV background subtraction."
 )
 
-tab1, tab2, tab3 = st.tabs(["Instructions & Demo", "Algorithm Comparison", "Execution"])
+tab1, tab2, tab3, tab4 = st.tabs(
+    ["Instructions & Demo", "Algorithm Comparison", "Execution", "Multi-Camera"]
+)
 
 with tab1:
     st.markdown(
@@ -33,11 +51,7 @@ with tab1:
 
     with col2:
         st.markdown("### Demo")
-        gif_b64 = get_image_base64(DEMO_TRAFFIC)
-        st.markdown(
-            f'<img src="{gif_b64}" width="100%" style="border-radius: 8px;">',
-            unsafe_allow_html=True,
-        )
+        render_demo(DEMO_TRAFFIC)
 
 with tab2:
     st.markdown("### Algorithm Comparison")
@@ -64,6 +78,61 @@ with tab2:
             )
 
 
+with tab4:
+    st.markdown("### Multi-Camera Monitoring")
+    st.markdown(
+        "Register several feeds on a shared background scheduler. Each camera keeps its own background model, and counts keep running across page reloads and browser sessions."
+    )
+
+    scheduler = get_stream_scheduler()
+
+    col1, col2 = st.columns([1, 2])
+
+    with col1:
+        stream_id = st.text_input(
+            "Camera ID:", value=f"CAM {len(scheduler.streams) + 1:02d}"
+        )
+        stream_source = st.text_input(
+            "Source (video path or camera index):", value=VIDEO_TRAFFIC_DEFAULT
+        )
+        stream_algorithm = st.selectbox(
+            "Algorithm:", ["MOG2", "KNN", "GMG", "CNT", "MOG"], key="stream_algorithm"
+        )
+        target_fps = st.number_input(
+            "Target FPS (0 = unlimited):", min_value=0, max_value=60, value=15
+        )
+
+        if st.button("➕ Add Camera", use_container_width=True):
+            source = int(stream_source) if stream_source.isdigit() else stream_source
+            scheduler.add_stream(
+                stream_id,
+                source,
+                target_fps=target_fps or None,
+                algorithm_type=stream_algorithm,
+            )
+
+    with col2:
+        snapshot = scheduler.snapshot()
+        st.metric("Total Vehicles (All Cameras)", str(scheduler.total_count()))
+
+        if snapshot:
+            import pandas as pd
+
+            st.dataframe(
+                pd.DataFrame.from_dict(snapshot, orient="index"),
+                use_container_width=True,
+            )
+            rcol1, rcol2 = st.columns(2)
+            remove_id = rcol1.selectbox("Camera:", list(snapshot))
+            if rcol2.button("🗑️ Remove Camera", use_container_width=True):
+                scheduler.remove_stream(remove_id)
+                st.rerun()
+        else:
+            st.caption("No cameras registered.")
+
+        st.button("🔄 Refresh", use_container_width=True)
+
+
 with tab3:
     st.markdown("### Input Feed")
 
@@ -78,6 +147,18 @@ with tab3:
             "Select Algorithm:", ["MOG2", "KNN", "GMG", "CNT", "MOG"]
         )
 
+        processing_scale = st.select_slider(
+            "Processing Scale:",
+            options=[0.25, 0.35, 0.5, 0.75, 1.0],
+            value=1.0,
+            help="Run subtraction and morphology on a downscaled frame. Boxes and the counting line stay in full resolution.",
+        )
+
+        band_only = st.checkbox(
+            "Process only the counting-line band",
+            help="Run subtraction and contour extraction only around the counting line.",
+        )
+
     with col2:
         video_file = None
         if input_method == "Upload Video":
@@ -118,48 +199,28 @@ with tab3:
 
     if start_btn and video_file:
         # Run CV2 Loop
-        cap = cv2.VideoCapture(video_file)
-        background_subtractor = get_subtractor(algorithm_type)
-
-        MIN_WIDTH = 40
-        MIN_HEIGHT = 40
-        PIXEL_OFFSET = 2
-        ROI_LINE = 620
-        vehicle_count = 0
-        centroids = []
+        cap = FrameSource(video_file)
+        counter = VehicleCounter(
+            algorithm_type,
+            scale=processing_scale,
+            regions=[line_band()] if band_only else None,
+        )
 
         while cap.isOpened() and not stop_btn:
             ret, frame = cap.read()
             if not ret:
-                veh_metric.metric("Total Vehicles", str(vehicle_count))
+                veh_metric.metric("Total Vehicles", str(counter.vehicle_count))
                 break
 
             # Process Frame
-            mask = background_subtractor.apply(frame)
-            mask = apply_filter(mask, "combine")
-
-            contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-            cv2.line(frame, (25, ROI_LINE), (1200, ROI_LINE), (255, 127, 0), 3)
-
-            for c in contours:
-                x, y, w, h = cv2.boundingRect(c)
-                if w >= MIN_WIDTH and h >= MIN_HEIGHT:
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                    centroid = get_centroid(x, y, w, h)
-                    centroids.append(centroid)
-                    cv2.circle(frame, centroid, 4, (0, 0, 255), -1)
-
-            for x, y in centroids[:]:
-                if (ROI_LINE + PIXEL_OFFSET) > y > (ROI_LINE - PIXEL_OFFSET):
-                    vehicle_count += 1
-                    cv2.line(frame, (25, ROI_LINE), (1200, ROI_LINE), (0, 127, 255), 3)
-                    centroids.remove((x, y))
+            event = counter.process(frame)
+            draw_detections(frame, event, counter.roi_line)
 
             # Update UI
             # Convert frame BGR to RGB for Streamlit
             frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             video_placeholder.image(frame_rgb, channels="RGB", use_column_width=True)
 
-            veh_metric.metric("Total Vehicles", str(vehicle_count))
+            veh_metric.metric("Total Vehicles", str(event["count"]))
 
         cap.release()
@@ -1,6 +1,55 @@
+import uuid
+
 import streamlit as st
-from utils.ui import configure_page, render_sidebar_info, get_image_base64
+import streamlit.components.v1 as components
+from utils.ui import configure_page, render_sidebar_info, render_demo
 from utils.config import DEMO_TRACKING
+from utils.streaming import LiveStream, get_mjpeg_server, player_html
+from utils.landmarkers import BACKEND_CHOICES, tasks_available
+
+# Per-frame hand tracking budget of the adaptive mode (~30 fps)
+ADAPTIVE_BUDGET_MS = 33
+
+
+def _make_processor(
+    adaptive=False,
+    backend="solutions",
+    running_mode="video",
+    model_complexity=1,
+    shared=False,
+):
+    """Frame callback for LiveStream; MediaPipe is only imported on start."""
+    import cv2
+    from utils.hand_tracking import HandTracker
+    from utils.loader import get_landmark_pool
+
+    if shared:
+        options = dict(pool=get_landmark_pool("hands", backend, model_complexity))
+    else:
+        options = dict(
+            backend=backend,
+            running_mode=running_mode,
+            model_complexity=model_complexity,
+        )
+    if adaptive:
+        options.update(detect_width=320, latency_budget_ms=ADAPTIVE_BUDGET_MS)
+    tracker = HandTracker(**options)
+
+    def process(frame, render):
+        frame = cv2.flip(frame, 1)  # Mirror image
+        frame, coords, handedness = tracker.find_hands(frame, draw=render)
+        fingers = tracker.fingers_up(coords, handedness)
+
+        metrics = {
+            "hands": str(len(coords)),
+            "fingers": str(int(fingers.sum())),
+            "sides": " & ".join(handedness) if len(handedness) else "—",
+            "latency_ms": tracker.stats()["latency_ms"],
+        }
+        return frame, metrics
+
+    return process, tracker.close
+
 
 configure_page("Gesture Tracking", "🤚")
 render_sidebar_info()
@@ -28,11 +77,7 @@ with tab1:
 
     with col2:
         st.markdown("### Demo")
-        gif_b64 = get_image_base64(DEMO_TRACKING)
-        st.markdown(
-            f'<img src="{gif_b64}" width="100%" style="border-radius: 8px;">',
-            unsafe_allow_html=True,
-        )
+        render_demo(DEMO_TRACKING)
 
     st.markdown("### Gestures & Commands (Local Script)")
     st.markdown(
@@ -50,70 +95,110 @@ with tab2:
 
     with col1:
         st.info("Uses your local webcam (Index 0).")
+        display_fps = st.select_slider(
+            "Display Rate:",
+            options=[0, 5, 10, 15, 30],
+            value=10,
+            format_func=lambda fps: "Metrics only" if fps == 0 else f"{fps} fps",
+            help="How often annotated frames are drawn and streamed to the page. Every frame is still analysed.",
+        )
+        jpeg_quality = st.slider(
+            "JPEG Quality",
+            min_value=30,
+            max_value=95,
+            value=75,
+            step=5,
+            help="Compression of the streamed frames. Lower values use less bandwidth.",
+        )
+        adaptive = st.checkbox(
+            "Adaptive Detection",
+            value=False,
+            help="Detect at low resolution and track inside a crop around the hands, lowering the size further when frames take longer than the budget. For slower CPUs.",
+        )
+        backend_label = st.selectbox(
+            "Landmark Backend",
+            list(BACKEND_CHOICES),
+            help="Tasks API HandLandmarker or the legacy Hands solution. The live stream mode runs inference asynchronously, overlapping capture.",
+        )
+        backend, running_mode = BACKEND_CHOICES[backend_label]
+        if backend == "tasks" and not tasks_available("hands"):
+            st.caption(
+                "hand_landmarker.task not found in models/ "
+                "(run models/download_mediapipe_models.py); using the Hands solution."
+            )
+        shared = st.checkbox(
+            "Shared Model Pool",
+            value=False,
+            help="Use the hand models shared by every viewer of this app instead of loading one per session. Saves memory with many viewers, but pooled models cannot track hands between frames: palm detection runs on every frame, which costs noticeably more CPU per frame than a per-session model. The live stream mode does not apply.",
+        )
+        lite_model = st.checkbox(
+            "Lite Model",
+            value=False,
+            help="Lower-complexity landmark model of the Hands solution: faster, slightly less precise.",
+        )
 
     with col2:
         start_btn = st.button(
             "▶️ Start Camera", type="primary", use_container_width=True
         )
+        stop_btn = st.button("⏹️ Stop Camera", use_container_width=True)
 
     st.markdown("### Analysis Results")
 
-    col3, col4 = st.columns([2, 1])
-
-    with col3:
-        video_placeholder = st.empty()
-
-    with col4:
-        st.markdown("### Live Metrics")
-        hands_metric = st.empty()
-        gest_metric = st.empty()
-        side_metric = st.empty()
-
-        hands_metric.metric("Hands Detected", "0")
-        gest_metric.metric("Fingers Up", "0")
-        side_metric.metric("Hand(s) Active", "—")
-
-        stop_btn = st.button("⏹️ Stop Camera", use_container_width=True)
-
+    # The camera runs on a server-side thread and is streamed as MJPEG, so
+    # this script returns right away and the Stop button is always live.
+    stream_key = "hand_tracking_stream"
     if start_btn:
-        import cv2
-        from utils.hand_tracking import HandTracker
-
-        cap = cv2.VideoCapture(0)
-        tracker = HandTracker()
-
-        while cap.isOpened() and not stop_btn:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            frame = cv2.flip(frame, 1)  # Mirror image
-            frame, all_hands = tracker.find_hands(frame)
-
-            # Extract Metrics
-            hands_count = len(all_hands)
-            total_fingers = 0
-            sides = []
-
-            for hand in all_hands:
-                fingers = tracker.fingers_up(hand)
-                total_fingers += sum(fingers)
-                sides.append(hand.get("type", ""))
-
-            if hands_count == 0:
-                fingers_status = "0"
-                side_label = "—"
-            else:
-                fingers_status = str(total_fingers)
-                side_label = " & ".join(sides) if sides else "—"
-
-            # Convert frame BGR to RGB for Streamlit
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            video_placeholder.image(frame_rgb, channels="RGB", use_column_width=True)
-
-            hands_metric.metric("Hands Detected", str(hands_count))
-            gest_metric.metric("Fingers Up", fingers_status, None)
-            side_metric.metric("Hand(s) Active", side_label, None)
-
-        cap.release()
-        st.rerun()
+        server = get_mjpeg_server()
+        stream_id = st.session_state.setdefault(
+            stream_key, f"hand-tracking-{uuid.uuid4().hex[:12]}"
+        )
+        process, close = _make_processor(
+            adaptive,
+            backend,
+            running_mode,
+            model_complexity=0 if lite_model else 1,
+            shared=shared,
+        )
+        server.register(
+            stream_id,
+            LiveStream(
+                0,
+                process,
+                jpeg_quality=jpeg_quality,
+                display_fps=display_fps,
+                on_close=close,
+            ),
+        )
+    elif stop_btn and stream_key in st.session_state:
+        get_mjpeg_server().unregister(st.session_state[stream_key])
+
+    stream = None
+    if stream_key in st.session_state:
+        server = get_mjpeg_server()
+        stream = server.get(st.session_state[stream_key])
+
+    if stream is not None and stream.running:
+        components.html(
+            player_html(
+                st.session_state[stream_key],
+                server.port,
+                {
+                    "Hands Detected": "hands",
+                    "Fingers Up": "fingers",
+                    "Hand(s) Active": "sides",
+                    "Analysis FPS": "analysis_fps",
+                    "Tracking Latency (ms)": "latency_ms",
+                },
+            ),
+            height=520,
+        )
+    else:
+        col3, col4 = st.columns([2, 1])
+        with col3:
+            st.info("Press Start Camera to stream the analysed webcam feed.")
+        with col4:
+            st.markdown("### Live Metrics")
+            st.metric("Hands Detected", "0")
+            st.metric("Fingers Up", "0")
+            st.metric("Hand(s) Active", "—")
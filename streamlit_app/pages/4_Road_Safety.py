@@ -1,76 +1,37 @@
+import uuid
+
 import cv2
-import mediapipe as mp
-import numpy as np
 import streamlit as st
-from utils.ui import configure_page, render_sidebar_info, get_image_base64
+import streamlit.components.v1 as components
+from utils.ui import configure_page, render_sidebar_info, render_demo
 from utils.config import DEMO_DROWSINESS
-
-# --- MediaPipe setup (module-level) ---
-_mp_face_mesh = mp.solutions.face_mesh
-_mp_draw = mp.solutions.drawing_utils
-_mp_draw_styles = mp.solutions.drawing_styles
-
-_LEFT_EYE = [362, 385, 387, 263, 373, 380]
-_RIGHT_EYE = [33, 160, 158, 133, 153, 144]
-_MOUTH = [61, 39, 37, 0, 267, 269, 291, 405]
+from utils.streaming import LiveStream, get_mjpeg_server, player_html
+from utils.landmarks import METRIC_IDS, landmarks_to_array, eye_mouth_ratios
+from utils.drowsiness import create_face_mesh, update_blink_state
+from utils.landmarkers import (
+    BACKEND_CHOICES,
+    draw_landmarks,
+    solutions,
+    tasks_available,
+)
+from utils.landmark_pool import LandmarkSession
+from utils.loader import get_landmark_pool
 
 
 # --- Helper functions ---
-def _euclidean(p1, p2):
-    return np.linalg.norm(np.array(p1) - np.array(p2))
-
-
-def _compute_ear(lm, eye_ids, w, h):
-    pts = [(int(lm[i].x * w), int(lm[i].y * h)) for i in eye_ids]
-    a = _euclidean(pts[1], pts[5])
-    b = _euclidean(pts[2], pts[4])
-    c = _euclidean(pts[0], pts[3])
-    return (a + b) / (2.0 * c) if c > 0 else 0.0
-
-
-def _compute_mar(lm, mouth_ids, w, h):
-    pts = [(int(lm[i].x * w), int(lm[i].y * h)) for i in mouth_ids]
-    a = _euclidean(pts[1], pts[7])
-    b = _euclidean(pts[2], pts[6])
-    c = _euclidean(pts[3], pts[5])
-    d = _euclidean(pts[0], pts[4])
-    return (a + b + c) / (2.0 * d) if d > 0 else 0.0
-
-
-def _update_blink_state(
-    ear_val,
-    ear_threshold,
-    closed_frames_threshold,
-    blink_count,
-    closed_counter,
-    eye_was_closed,
-):
-    """Returns (status, alert, blink_count, closed_counter, eye_was_closed)."""
-    alert = False
-    status = "✅ Alert"
-    if ear_val < ear_threshold:
-        closed_counter += 1
-        if not eye_was_closed:
-            blink_count += 1
-            eye_was_closed = True
-        if closed_counter >= closed_frames_threshold:
-            alert = True
-            status = "⚠️ FATIGUE DETECTED!"
-    else:
-        closed_counter = 0
-        eye_was_closed = False
-    return status, alert, blink_count, closed_counter, eye_was_closed
-
-
 def _draw_overlay(frame, face_lms, ear_val, mar_val, alert):
     """Draw face mesh contours and EAR/MAR text onto frame."""
     # BGR: red on alert, yellow normally
     line_color = (0, 0, 255) if alert else (0, 220, 255)
-    custom_spec = _mp_draw.DrawingSpec(color=line_color, thickness=1, circle_radius=1)
-    _mp_draw.draw_landmarks(
+    # MediaPipe is imported on first use so the instructions tab renders fast
+    mp_solutions = solutions()
+    custom_spec = mp_solutions.drawing_utils.DrawingSpec(
+        color=line_color, thickness=1, circle_radius=1
+    )
+    draw_landmarks(
         frame,
         face_lms,
-        _mp_face_mesh.FACEMESH_CONTOURS,
+        mp_solutions.face_mesh.FACEMESH_CONTOURS,
         landmark_drawing_spec=custom_spec,
         connection_drawing_spec=custom_spec,
     )
@@ -98,6 +59,7 @@ def _draw_overlay(frame, face_lms, ear_val, mar_val, alert):
 def _process_face(
     frame,
     face_lms,
+    points,
     ear_threshold,
     mar_threshold,
     closed_frames_threshold,
@@ -106,14 +68,13 @@ def _process_face(
     blink_count,
     closed_counter,
     eye_was_closed,
+    draw=True,
 ):
-    lm = face_lms.landmark
-    left_ear = _compute_ear(lm, _LEFT_EYE, w, h)
-    right_ear = _compute_ear(lm, _RIGHT_EYE, w, h)
-    ear_val = (left_ear + right_ear) / 2.0
-    mar_val = _compute_mar(lm, _MOUTH, w, h)
+    left_ear, right_ear, mar = eye_mouth_ratios(points, w, h)
+    ear_val = float(left_ear + right_ear) / 2.0
+    mar_val = float(mar)
 
-    status, alert, blink_count, closed_counter, eye_was_closed = _update_blink_state(
+    status, alert, blink_count, closed_counter, eye_was_closed = update_blink_state(
         ear_val,
         ear_threshold,
         closed_frames_threshold,
@@ -124,8 +85,96 @@ def _process_face(
     if mar_val > mar_threshold:
         status = "🥱 Yawning!"
 
-    _draw_overlay(frame, face_lms, ear_val, mar_val, alert)
-    return frame, ear_val, mar_val, status, blink_count, closed_counter, eye_was_closed
+    if draw:
+        _draw_overlay(frame, face_lms, ear_val, mar_val, alert)
+    return (
+        frame,
+        ear_val,
+        mar_val,
+        status,
+        blink_count,
+        closed_counter,
+        eye_was_closed,
+    )
+
+
+def _make_processor(
+    ear_threshold,
+    mar_threshold,
+    closed_frames_threshold,
+    backend="solutions",
+    running_mode="video",
+    shared=False,
+):
+    """Frame callback for LiveStream, holding the blink counters.
+
+    With ``shared`` the landmarks come from the process-wide model pool
+    (as normalized arrays, which ``draw_landmarks`` also accepts);
+    otherwise this session loads its own FaceMesh/FaceLandmarker.
+    """
+    if shared:
+        session = LandmarkSession(get_landmark_pool("face", backend))
+        close = session.close
+    else:
+        face_mesh = create_face_mesh(backend=backend, running_mode=running_mode)
+        close = face_mesh.close
+    points = None  # landmark buffer reused across frames
+    blink_count, closed_counter, eye_was_closed = 0, 0, False
+
+    def detect_faces(frame_rgb):
+        """Yields (face landmarks to draw, (N, 3) points) per detected face."""
+        nonlocal points
+        if shared:
+            faces, _ = session.process(frame_rgb)
+            for face in faces:
+                yield face, face
+            return
+        results = face_mesh.process(frame_rgb)
+        for face_lms in results.multi_face_landmarks or []:
+            points = landmarks_to_array(face_lms.landmark, out=points, ids=METRIC_IDS)
+            yield face_lms, points
+
+    def process(frame, render):
+        nonlocal blink_count, closed_counter, eye_was_closed
+        frame = cv2.flip(frame, 1)
+        h, w, _ = frame.shape
+        ear_val, mar_val, status = 0.0, 0.0, "✅ Alert"
+
+        for face_lms, face_points in detect_faces(
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        ):
+            (
+                frame,
+                ear_val,
+                mar_val,
+                status,
+                blink_count,
+                closed_counter,
+                eye_was_closed,
+            ) = _process_face(
+                frame,
+                face_lms,
+                face_points,
+                ear_threshold,
+                mar_threshold,
+                closed_frames_threshold,
+                w,
+                h,
+                blink_count,
+                closed_counter,
+                eye_was_closed,
+                draw=render,
+            )
+
+        metrics = {
+            "ear": f"{ear_val:.3f}",
+            "mar": f"{mar_val:.3f}",
+            "blinks": str(blink_count),
+            "status": status,
+        }
+        return frame, metrics
+
+    return process, close
 
 
 # --- Page layout ---
@@ -156,11 +205,7 @@ with tab1:
 
     with col2:
         st.markdown("### Demo")
-        gif_b64 = get_image_base64(DEMO_DROWSINESS)
-        st.markdown(
-            f'<img src="{gif_b64}" width="100%" style="border-radius: 8px;">',
-            unsafe_allow_html=True,
-        )
+        render_demo(DEMO_DROWSINESS)
 
     st.markdown("### EAR & MAR Formulas")
 
@@ -209,81 +254,106 @@ with tab2:
             help="Consecutive frames with low EAR before alerting.",
         )
 
-    start_btn = st.button("▶️ Start Camera", type="primary", use_container_width=True)
-
-    st.markdown("### Analysis Results")
-    col3, col4 = st.columns([2, 1])
-
-    with col3:
-        video_placeholder = st.empty()
-
-    with col4:
-        st.markdown("### Live Metrics")
-        ear_metric = st.empty()
-        mar_metric = st.empty()
-        blink_metric = st.empty()
-        status_metric = st.empty()
+    col_rate, col_quality, col_backend = st.columns(3)
+    with col_rate:
+        display_fps = st.select_slider(
+            "Display Rate:",
+            options=[0, 5, 10, 15, 30],
+            value=10,
+            format_func=lambda fps: "Metrics only" if fps == 0 else f"{fps} fps",
+            help="How often annotated frames are drawn and streamed to the page. Every frame is still analysed.",
+        )
+    with col_quality:
+        jpeg_quality = st.slider(
+            "JPEG Quality",
+            min_value=30,
+            max_value=95,
+            value=75,
+            step=5,
+            help="Compression of the streamed frames. Lower values use less bandwidth.",
+        )
+    with col_backend:
+        backend_label = st.selectbox(
+            "Landmark Backend",
+            list(BACKEND_CHOICES),
+            help="Tasks API FaceLandmarker or the legacy FaceMesh solution. The live stream mode runs inference asynchronously, overlapping capture.",
+        )
+        backend, running_mode = BACKEND_CHOICES[backend_label]
+        if backend == "tasks" and not tasks_available("face"):
+            st.caption(
+                "face_landmarker.task not found in models/ "
+                "(run models/download_mediapipe_models.py); using FaceMesh."
+            )
+        shared = st.checkbox(
+            "Shared Model Pool",
+            value=False,
+            help="Use the face models shared by every viewer of this app instead of loading one per session. Saves memory with many viewers, but pooled models cannot track the face between frames: face detection runs on every frame (about 1.4x the CPU time per frame of a per-session FaceMesh). The live stream mode does not apply.",
+        )
 
-        ear_metric.metric("EAR", "—")
-        mar_metric.metric("MAR", "—")
-        blink_metric.metric("Blinks", "0")
-        status_metric.metric("Status", "Awaiting Feed")
+    col_start, col_stop = st.columns(2)
+    start_btn = col_start.button(
+        "▶️ Start Camera", type="primary", use_container_width=True
+    )
+    stop_btn = col_stop.button("⏹️ Stop Camera", use_container_width=True)
 
-        stop_btn = st.button("⏹️ Stop Camera", use_container_width=True)
+    st.markdown("### Analysis Results")
 
+    # The camera runs on a server-side thread and is streamed as MJPEG, so
+    # this script returns right away and the Stop button is always live.
+    stream_key = "road_safety_stream"
     if start_btn:
-        cap = cv2.VideoCapture(0)
-        face_mesh = _mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
+        server = get_mjpeg_server()
+        stream_id = st.session_state.setdefault(
+            stream_key, f"road-safety-{uuid.uuid4().hex[:12]}"
         )
-        blink_count, closed_counter, eye_was_closed = 0, 0, False
-
-        while cap.isOpened() and not stop_btn:
-            ret, frame = cap.read()
-            if not ret:
-                break
-
-            frame = cv2.flip(frame, 1)
-            h, w, _ = frame.shape
-            results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
-            ear_val, mar_val, status = 0.0, 0.0, "✅ Alert"
-
-            if results.multi_face_landmarks:
-                for face_lms in results.multi_face_landmarks:
-                    (
-                        frame,
-                        ear_val,
-                        mar_val,
-                        status,
-                        blink_count,
-                        closed_counter,
-                        eye_was_closed,
-                    ) = _process_face(
-                        frame,
-                        face_lms,
-                        ear_threshold,
-                        mar_threshold,
-                        closed_frames_threshold,
-                        w,
-                        h,
-                        blink_count,
-                        closed_counter,
-                        eye_was_closed,
-                    )
-
-            video_placeholder.image(
-                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB),
-                channels="RGB",
-                use_column_width=True,
-            )
-            ear_metric.metric("EAR", f"{ear_val:.3f}")
-            mar_metric.metric("MAR", f"{mar_val:.3f}")
-            blink_metric.metric("Blinks", str(blink_count))
-            status_metric.metric("Status", status)
-
-        cap.release()
-        face_mesh.close()
-        st.rerun()
+        process, close = _make_processor(
+            ear_threshold,
+            mar_threshold,
+            closed_frames_threshold,
+            backend,
+            running_mode,
+            shared,
+        )
+        server.register(
+            stream_id,
+            LiveStream(
+                0,
+                process,
+                jpeg_quality=jpeg_quality,
+                display_fps=display_fps,
+                on_close=close,
+            ),
+        )
+    elif stop_btn and stream_key in st.session_state:
+        get_mjpeg_server().unregister(st.session_state[stream_key])
+
+    stream = None
+    if stream_key in st.session_state:
+        server = get_mjpeg_server()
+        stream = server.get(st.session_state[stream_key])
+
+    if stream is not None and stream.running:
+        components.html(
+            player_html(
+                st.session_state[stream_key],
+                server.port,
+                {
+                    "EAR": "ear",
+                    "MAR": "mar",
+                    "Blinks": "blinks",
+                    "Status": "status",
+                    "Analysis FPS": "analysis_fps",
+                },
+            ),
+            height=520,
+        )
+    else:
+        col3, col4 = st.columns([2, 1])
+        with col3:
+            st.info("Press Start Camera to stream the analysed webcam feed.")
+        with col4:
+            st.markdown("### Live Metrics")
+            st.metric("EAR", "—")
+            st.metric("MAR", "—")
+            st.metric("Blinks", "0")
+            st.metric("Status", "Awaiting Feed")
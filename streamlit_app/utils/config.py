@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Base directories
@@ -5,6 +6,10 @@ BASE_DIR = Path(__file__).parent.parent
 ASSETS_DIR = BASE_DIR / "assets"
 MODELS_DIR = BASE_DIR / "models"
 DEMOS_DIR = ASSETS_DIR / "demos"
+# Served by Streamlit at app/static/ (server.enableStaticServing)
+STATIC_DIR = BASE_DIR / "static"
+STATIC_MEDIA_DIR = STATIC_DIR / "media"
+MEDIA_MANIFEST = STATIC_MEDIA_DIR / "manifest.json"
 
 # Dashboard Previews
 IMG_PREVIEW_CLASSIFICATION = str(
@@ -43,3 +48,27 @@ VIDEO_TRAFFIC_DEFAULT = str(ASSETS_DIR / "Ponte.mp4")
 
 # Models
 MODEL_CIFAR10 = str(MODELS_DIR / "cifar10_cnn.h5")
+MODEL_CIFAR10_TFLITE = {
+    "float16": str(MODELS_DIR / "cifar10_cnn_float16.tflite"),
+    "int8": str(MODELS_DIR / "cifar10_cnn_int8.tflite"),
+}
+MODEL_CIFAR10_TFLITE_REPORT = str(MODELS_DIR / "cifar10_tflite_report.json")
+
+# MediaPipe Tasks bundles (models/download_mediapipe_models.py)
+MODEL_HAND_LANDMARKER = str(MODELS_DIR / "hand_landmarker.task")
+MODEL_FACE_LANDMARKER = str(MODELS_DIR / "face_landmarker.task")
+
+# In-process cache of inlined (base64) media, used when no built file exists
+MEDIA_CACHE_MAX_BYTES = 32 * 1024 * 1024
+MEDIA_INLINE_MAX_BYTES = 8 * 1024 * 1024
+
+# Live camera streaming (MJPEG endpoint used by the webcam pages). Unset,
+# the host follows Streamlit's server.address, else loopback only. The
+# server speaks plain HTTP; STREAM_URL is its public base URL when it sits
+# behind a (TLS) reverse proxy
+STREAM_HOST = os.environ.get("CV_HUB_STREAM_HOST")
+STREAM_PORT = int(os.environ.get("CV_HUB_STREAM_PORT", "8765"))
+STREAM_URL = os.environ.get("CV_HUB_STREAM_URL")
+
+# Landmark models shared by all live sessions (0 = sized from the CPU count)
+LANDMARK_WORKERS = int(os.environ.get("CV_HUB_LANDMARK_WORKERS", "0"))
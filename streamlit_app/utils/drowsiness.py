@@ -0,0 +1,237 @@
+import math
+import os
+
+import cv2
+import numpy as np
+
+from utils.landmarkers import create_face_landmarker
+from utils.landmarks import METRIC_IDS, eye_mouth_ratios, landmarks_to_array
+
+NUM_FACE_LANDMARKS = 478  # FaceMesh with refine_landmarks=True
+
+
+def update_blink_state(
+    ear_val,
+    ear_threshold,
+    closed_frames_threshold,
+    blink_count,
+    closed_counter,
+    eye_was_closed,
+):
+    """Returns (status, alert, blink_count, closed_counter, eye_was_closed)."""
+    alert = False
+    status = "✅ Alert"
+    if ear_val < ear_threshold:
+        closed_counter += 1
+        if not eye_was_closed:
+            blink_count += 1
+            eye_was_closed = True
+        if closed_counter >= closed_frames_threshold:
+            alert = True
+            status = "⚠️ FATIGUE DETECTED!"
+    else:
+        closed_counter = 0
+        eye_was_closed = False
+    return status, alert, blink_count, closed_counter, eye_was_closed
+
+
+def create_face_mesh(
+    static_image_mode=False, backend="solutions", running_mode="video"
+):
+    """Face landmarker configured like the live Road Safety page."""
+    return create_face_landmarker(
+        backend=backend,
+        running_mode=running_mode,
+        static_image_mode=static_image_mode,
+        max_num_faces=1,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
+
+
+class _Series:
+    """Growable per-frame columns, stored as the final NPZ arrays."""
+
+    COLUMNS = {
+        "frame": np.int32,
+        "time_s": np.float32,
+        "face": np.bool_,
+        "ear": np.float32,
+        "mar": np.float32,
+        "blinks": np.int32,
+        "alert": np.bool_,
+        "yawn": np.bool_,
+    }
+
+    def __init__(self):
+        self.parts = {name: [] for name in self.COLUMNS}
+
+    def append(self, **columns):
+        for name, values in columns.items():
+            self.parts[name].append(np.asarray(values, dtype=self.COLUMNS[name]))
+
+    def arrays(self):
+        return {
+            name: (np.concatenate(parts) if parts else np.empty(0, dtype))
+            for (name, dtype), parts in zip(self.COLUMNS.items(), self.parts.values())
+        }
+
+
+def analyze_video(
+    video_path,
+    every_k=1,
+    ear_threshold=0.25,
+    mar_threshold=0.55,
+    closed_frames_threshold=20,
+    chunk_size=256,
+    backend="solutions",
+):
+    """Run the drowsiness metrics over a video file without rendering anything.
+
+    Only every ``every_k``-th frame is decoded and sent to FaceMesh (skipped
+    frames are grabbed, not retrieved). Landmarks are gathered into a chunk
+    buffer and EAR/MAR are computed for the whole chunk at once before the
+    blink state machine runs over it. ``closed_frames_threshold`` is given
+    in source frames and rescaled to the sampling step. ``backend`` selects
+    the solutions FaceMesh or the Tasks FaceLandmarker (in video mode).
+
+    Returns a dict of per-sample columns (``frame``, ``time_s``, ``face``,
+    ``ear``, ``mar``, ``blinks``, ``alert``, ``yawn``); EAR/MAR are NaN where
+    no face was found.
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Failed to open video: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    every_k = max(1, int(every_k))
+    closed_samples = max(1, math.ceil(closed_frames_threshold / every_k))
+
+    face_mesh = create_face_mesh(backend=backend)
+    points = np.zeros((chunk_size, NUM_FACE_LANDMARKS, 3), dtype=np.float32)
+    frames = np.empty(chunk_size, dtype=np.int32)
+    found = np.zeros(chunk_size, dtype=bool)
+    series = _Series()
+    blink_count, closed_counter, eye_was_closed = 0, 0, False
+    w = h = 0
+
+    def flush(n):
+        nonlocal blink_count, closed_counter, eye_was_closed
+        left_ear, right_ear, mar = eye_mouth_ratios(points[:n], w, h)
+        ear = (left_ear + right_ear) / 2.0
+        ear[~found[:n]] = np.nan
+        mar[~found[:n]] = np.nan
+
+        blinks = np.empty(n, dtype=np.int32)
+        alerts = np.zeros(n, dtype=bool)
+        for i in range(n):
+            if found[i]:
+                _, alerts[i], blink_count, closed_counter, eye_was_closed = (
+                    update_blink_state(
+                        ear[i],
+                        ear_threshold,
+                        closed_samples,
+                        blink_count,
+                        closed_counter,
+                        eye_was_closed,
+                    )
+                )
+            blinks[i] = blink_count
+
+        series.append(
+            frame=frames[:n],
+            time_s=frames[:n] / fps,
+            face=found[:n],
+            ear=ear,
+            mar=mar,
+            blinks=blinks,
+            alert=alerts,
+            yawn=found[:n] & (mar > mar_threshold),
+        )
+
+    n, frame_index = 0, -1
+    try:
+        while True:
+            frame_index += 1
+            if frame_index % every_k:
+                if not cap.grab():
+                    break
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            # Same orientation as the live page, so landmarks match
+            frame = cv2.flip(frame, 1)
+            h, w = frame.shape[:2]
+            results = face_mesh.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            frames[n] = frame_index
+            found[n] = bool(results.multi_face_landmarks)
+            if found[n]:
+                landmarks_to_array(
+                    results.multi_face_landmarks[0].landmark,
+                    out=points[n],
+                    ids=METRIC_IDS,
+                )
+            n += 1
+            if n == chunk_size:
+                flush(n)
+                n = 0
+        if n:
+            flush(n)
+    finally:
+        cap.release()
+        face_mesh.close()
+
+    data = series.arrays()
+    data["fps"] = np.float32(fps)
+    data["every_k"] = np.int32(every_k)
+    return data
+
+
+def summarize(data):
+    """Headline numbers of an ``analyze_video`` result."""
+    alert = data["alert"]
+    # Alert episodes start where the flag switches on
+    episodes = int(np.count_nonzero(alert[1:] & ~alert[:-1]) + alert[:1].sum())
+    yawn = data["yawn"]
+    return {
+        "samples": int(len(data["frame"])),
+        "duration_s": round(float(data["time_s"][-1]), 2) if len(alert) else 0.0,
+        "face_ratio": round(float(data["face"].mean()), 4) if len(alert) else 0.0,
+        "blinks": int(data["blinks"][-1]) if len(alert) else 0,
+        "alert_episodes": episodes,
+        "yawns": int(np.count_nonzero(yawn[1:] & ~yawn[:-1]) + yawn[:1].sum()),
+    }
+
+
+def _analyze_to_file(video_path, output_dir, options):
+    data = analyze_video(video_path, **options)
+    name = os.path.splitext(os.path.basename(video_path))[0]
+    output_path = os.path.join(output_dir, f"{name}_drowsiness.npz")
+    np.savez_compressed(output_path, **data)
+    return {"video": video_path, "output": output_path, **summarize(data)}
+
+
+def analyze_videos(video_paths, output_dir, workers=None, **options):
+    """Analyze many recordings in a process pool, one NPZ time series per file.
+
+    Each worker runs its own FaceMesh instance; workers are spawned rather
+    than forked because MediaPipe graphs do not survive a fork. ``options``
+    are passed to ``analyze_video``. Returns one summary dict per video, in
+    input order.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(video_paths)))
+    if workers == 1:
+        return [_analyze_to_file(p, output_dir, options) for p in video_paths]
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [
+            pool.submit(_analyze_to_file, p, output_dir, options) for p in video_paths
+        ]
+        return [f.result() for f in futures]
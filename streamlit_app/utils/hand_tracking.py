@@ -1,82 +1,205 @@
+import time
+
 import cv2
+import numpy as np
 
-try:
-    import google.protobuf.internal
-    import google.protobuf.internal.builder
+from utils.landmarkers import create_hand_landmarker, draw_landmarks, solutions
+from utils.landmark_pool import LandmarkSession
+from utils.landmarks import fingers_up, hands_to_normalized, scale_hands
+from utils.video import RenderThrottle
 
-    google.protobuf.internal.builder = google.protobuf.internal.builder
-except ImportError:
-    pass
-import mediapipe as mp
-import mediapipe.python.solutions.hands as mp_hands
-import mediapipe.python.solutions.drawing_utils as mp_draw
+# Widths the adaptive mode steps through, largest first
+DETECT_WIDTHS = [640, 480, 320, 256]
 
 
 class HandTracker:
+    """MediaPipe Hands wrapper returning landmarks as NumPy arrays.
+
+    With ``detect_width`` set, frames are downscaled to that width before
+    detection and, once hands are found, only a square crop around them
+    (padded by ``roi_margin``) is processed. Landmarks are mapped back to the
+    full frame either way. With ``latency_budget_ms`` as well, the detection
+    width steps down through ``DETECT_WIDTHS`` while the smoothed latency is
+    over budget and back up when there is headroom.
+
+    ``backend``, ``running_mode``, ``model_complexity`` and ``delegate`` are
+    passed to ``create_hand_landmarker``. With the asynchronous
+    "live_stream" mode the crop is not used, since a result may belong to an
+    earlier frame than the one being processed.
+
+    With a shared ``pool`` (``LandmarkPool``) no model is created; frames go
+    to the pool through a ``LandmarkSession`` that smooths this tracker's
+    landmarks over time. The crop is not used there either, since pooled
+    models do not track between frames.
+    """
+
     def __init__(
         self,
         static_image_mode=False,
         max_num_hands=2,
         min_detection_confidence=0.5,
         min_tracking_confidence=0.5,
+        detect_width=None,
+        latency_budget_ms=None,
+        roi_margin=0.3,
+        redetect_every=30,
+        backend="solutions",
+        running_mode="video",
+        model_complexity=1,
+        delegate="cpu",
+        pool=None,
     ):
-        try:
-            self.mp_hands = mp.solutions.hands
-            self.mp_draw = mp.solutions.drawing_utils
-        except AttributeError:
-
-            self.mp_hands = mp_hands
-            self.mp_draw = mp_draw
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=static_image_mode,
-            max_num_hands=max_num_hands,
-            min_detection_confidence=min_detection_confidence,
-            min_tracking_confidence=min_tracking_confidence,
+        self.session = None if pool is None else LandmarkSession(pool)
+        self.hands = None
+        if pool is None:
+            self.hands = create_hand_landmarker(
+                backend=backend,
+                running_mode=running_mode,
+                static_image_mode=static_image_mode,
+                max_num_hands=max_num_hands,
+                model_complexity=model_complexity,
+                min_detection_confidence=min_detection_confidence,
+                min_tracking_confidence=min_tracking_confidence,
+                delegate=delegate,
+            )
+        self.connections = solutions().hands.HAND_CONNECTIONS
+        self.use_roi = (
+            pool is None and getattr(self.hands, "running_mode", None) != "live_stream"
         )
 
-    def find_hands(self, img, draw=True):
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(img_rgb)
+        self.detect_width = detect_width
+        self.latency_budget_ms = latency_budget_ms
+        self.roi_margin = roi_margin
+        self.redetect_every = redetect_every
+        self.roi = None
+        self.frames_in_roi = 0
+        self.latency_ms = 0.0
+        self.rate = RenderThrottle(0)
+
+    def find_hands(self, img, draw=True, flip_side=False):
+        """Returns (img, coords, handedness); coords is an (H, 21, 3) int32 array.
 
-        all_hands = []
-        h, w, c = img.shape
-        if self.results.multi_hand_landmarks:
-            for hand_type, hand_lms in zip(
-                self.results.multi_handedness, self.results.multi_hand_landmarks
+        Coordinates are always in pixels of ``img``, whatever size the
+        landmarks were actually detected at.
+        """
+        start = time.perf_counter()
+        h, w = img.shape[:2]
+        if self.roi is None:
+            x0, y0, view = 0, 0, img
+        else:
+            x0, y0, x1, y1 = self.roi
+            view = img[y0:y1, x0:x1]
+
+        img_rgb = cv2.cvtColor(self._downscale(view), cv2.COLOR_BGR2RGB)
+        if self.session is not None:
+            raw, labels = self.session.process(img_rgb)
+            hand_lists = raw
+        else:
+            self.results = self.hands.process(img_rgb)
+            raw, labels = hands_to_normalized(
+                self.results.multi_hand_landmarks, self.results.multi_handedness
+            )
+            hand_lists = self.results.multi_hand_landmarks or []
+
+        # Landmarks are normalized to the processed image, so scaling by the
+        # view size (crop or full frame) maps them back to display pixels
+        view_h, view_w = view.shape[:2]
+        coords, handedness = scale_hands(
+            raw, labels, view_w, view_h, flip_side, offset=(x0, y0)
+        )
+        if draw:
+            for hand_lms in hand_lists:
+                draw_landmarks(view, hand_lms, self.connections)
+
+        if self.detect_width:
+            if self.use_roi:
+                self._update_roi(coords, w, h)
+            self._adapt((time.perf_counter() - start) * 1000.0)
+        else:
+            self.latency_ms = (time.perf_counter() - start) * 1000.0
+        self.rate.tick()
+        return img, coords, handedness
+
+    def _downscale(self, view):
+        if not self.detect_width or view.shape[1] <= self.detect_width:
+            return view
+        scale = self.detect_width / view.shape[1]
+        size = (self.detect_width, max(1, round(view.shape[0] * scale)))
+        return cv2.resize(view, size, interpolation=cv2.INTER_AREA)
+
+    def _update_roi(self, coords, w, h):
+        """Crop the next frame around the hands found in this one.
+
+        The crop is kept while the hands stay well inside it, so MediaPipe's
+        own tracking sees a stable image between frames, and dropped every
+        ``redetect_every`` frames so hands outside it can still be found.
+        """
+        self.frames_in_roi += 1
+        if len(coords) == 0 or self.frames_in_roi >= self.redetect_every:
+            self.roi, self.frames_in_roi = None, 0
+            return
+
+        bx0, by0 = coords[..., :2].min(axis=(0, 1))
+        bx1, by1 = coords[..., :2].max(axis=(0, 1))
+        if self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            inset = 0.5 * self.roi_margin * (x1 - x0)
+            if (
+                bx0 > x0 + inset
+                and by0 > y0 + inset
+                and bx1 < x1 - inset
+                and by1 < y1 - inset
             ):
-                my_hand = {}
-                mylmList = []
-                for id, lm in enumerate(hand_lms.landmark):
-                    px, py, pz = int(lm.x * w), int(lm.y * h), int(lm.z * w)
-                    mylmList.append([px, py, pz])
-
-                my_hand["lmList"] = mylmList
-                my_hand["type"] = hand_type.classification[0].label
-                all_hands.append(my_hand)
-
-                if draw:
-                    self.mp_draw.draw_landmarks(
-                        img, hand_lms, self.mp_hands.HAND_CONNECTIONS
-                    )
-
-        return img, all_hands
-
-    def fingers_up(self, my_hand):
-        my_hand_type = my_hand["type"]
-        my_lm_list = my_hand["lmList"]
-
-        if len(my_lm_list) != 21:
-            return []
-
-        fingers = []
-        # Thumb
-        if my_hand_type == "Right":
-            fingers.append(1 if my_lm_list[4][0] < my_lm_list[3][0] else 0)
+                return
+
+        side = max(bx1 - bx0, by1 - by0) * (1.0 + 2.0 * self.roi_margin)
+        side = int(min(max(side, 64), w, h))
+        cx, cy = (bx0 + bx1) // 2, (by0 + by1) // 2
+        x0 = int(np.clip(cx - side // 2, 0, w - side))
+        y0 = int(np.clip(cy - side // 2, 0, h - side))
+        if side * side > 0.6 * w * h:
+            # Cropping would barely shrink the input; stay on the full frame
+            self.roi = None
         else:
-            fingers.append(1 if my_lm_list[4][0] > my_lm_list[3][0] else 0)
+            self.roi = (x0, y0, x0 + side, y0 + side)
+
+    def _adapt(self, latency_ms):
+        """Smooth the per-frame latency and step the detection size to the budget."""
+        if self.rate.ticks == 0:
+            # The first call includes graph warm-up; do not let it steer
+            return
+        if not self.latency_ms:
+            self.latency_ms = latency_ms
+        self.latency_ms += 0.1 * (latency_ms - self.latency_ms)
+        if not self.latency_budget_ms:
+            return
+        smaller = [w for w in DETECT_WIDTHS if w < self.detect_width]
+        larger = [w for w in DETECT_WIDTHS if w > self.detect_width]
+        if self.latency_ms > self.latency_budget_ms and smaller:
+            self.detect_width = smaller[0]
+        elif self.latency_ms < 0.5 * self.latency_budget_ms and larger:
+            self.detect_width = larger[-1]
+        else:
+            return
+        # Start measuring the new size from the budget, not the old average
+        self.latency_ms = 0.75 * self.latency_budget_ms
+
+    def stats(self):
+        """Achieved FPS, smoothed processing latency and current detection setup."""
+        return {
+            "fps": round(self.rate.fps, 1),
+            "latency_ms": round(self.latency_ms, 1),
+            "detect_width": self.detect_width,
+            "roi": self.roi is not None,
+        }
 
-        # 4 Fingers
-        for id in range(8, 21, 4):
-            fingers.append(1 if my_lm_list[id][1] < my_lm_list[id - 2][1] else 0)
+    def close(self):
+        if self.hands is not None:
+            self.hands.close()
+        if self.session is not None:
+            self.session.close()
 
-        return fingers
+    @staticmethod
+    def fingers_up(coords, handedness):
+        """(H, 5) boolean array of raised fingers for every hand."""
+        return fingers_up(coords, handedness)
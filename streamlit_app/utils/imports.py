@@ -0,0 +1,35 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds spent importing each heavy framework, filled on first use
+IMPORT_TIMES = {}
+_import_lock = threading.Lock()
+
+
+def import_heavy(module_name):
+    """Import an ML framework (TensorFlow, MediaPipe) only when inference needs it.
+
+    Pages and the landing panel stay free of these imports until a model is
+    actually requested; the first import time is logged and kept in
+    ``IMPORT_TIMES``. Imports are serialized, so threads that need the same
+    framework at once (e.g. landmark workers) do not race on a partially
+    initialized package. This module does not import Streamlit, so offline
+    scripts and worker processes can use it too.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None and module_name in IMPORT_TIMES:
+        return module
+
+    with _import_lock:
+        if module_name in IMPORT_TIMES:
+            return sys.modules[module_name]
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        IMPORT_TIMES[module_name] = time.perf_counter() - start
+    logger.info("Imported %s in %.2fs", module_name, IMPORT_TIMES[module_name])
+    return module
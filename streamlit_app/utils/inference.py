@@ -0,0 +1,197 @@
+import hashlib
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+
+
+def preprocess_image(image):
+    """Resize a PIL image to the 32x32 RGB float32 input of the CIFAR-10 CNN."""
+    img_resized = image.resize((32, 32))
+    if img_resized.mode != "RGB":
+        img_resized = img_resized.convert("RGB")
+    return np.asarray(img_resized, dtype=np.float32) / 255.0
+
+
+class TFLiteClassifier:
+    """Runs an exported ``.tflite`` CIFAR-10 model with the TFLite interpreter.
+
+    Uses the standalone ``tflite_runtime`` package when installed and falls
+    back to ``tf.lite``. Callable like the Keras model (``model(x)``), so it
+    plugs into ``InferenceService``; int8 inputs and outputs are
+    (de)quantized transparently.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = int(self.input["shape"][0])
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        self.interpreter.resize_tensor_input(
+            self.input["index"], [batch_size, *self.input["shape"][1:]]
+        )
+        self.interpreter.allocate_tensors()
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self.batch_size = batch_size
+
+    def __call__(self, batch, training=False):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if len(batch) != self.batch_size:
+                self._resize(len(batch))
+
+            scale, zero_point = self.input["quantization"]
+            if self.input["dtype"] != np.float32 and scale:
+                info = np.iinfo(self.input["dtype"])
+                batch = np.clip(
+                    np.round(batch / scale + zero_point), info.min, info.max
+                )
+            self.interpreter.set_tensor(
+                self.input["index"], batch.astype(self.input["dtype"])
+            )
+            self.interpreter.invoke()
+            probs = self.interpreter.get_tensor(self.output["index"])
+
+            scale, zero_point = self.output["quantization"]
+            if self.output["dtype"] != np.float32 and scale:
+                probs = (probs.astype(np.float32) - zero_point) * scale
+            return probs.astype(np.float32)
+
+
+class InferenceService:
+    """Shared classifier front-end: micro-batching, LRU cache and direct calls.
+
+    Concurrent ``predict`` calls are queued and grouped into a single forward
+    pass of up to ``max_batch_size`` images, waiting at most ``max_wait_ms``
+    for a batch to fill. Probability vectors are cached by a hash of the input
+    pixels, and the model is called directly (``model(x, training=False)``)
+    to skip the per-call setup of ``model.predict``.
+    """
+
+    def __init__(self, model, max_batch_size=32, max_wait_ms=5, cache_size=1024):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._batch_loop, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _key(x):
+        digest = hashlib.blake2b(x.tobytes(), digest_size=16)
+        digest.update(str(x.shape).encode())
+        return digest.hexdigest()
+
+    def _cache_get(self, key):
+        with self._cache_lock:
+            probs = self._cache.get(key)
+            if probs is None:
+                self.misses += 1
+                return None
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return probs
+
+    def _cache_put(self, key, probs):
+        with self._cache_lock:
+            self._cache[key] = probs
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _run(self, batch):
+        self.batches += 1
+        return np.asarray(self.model(batch, training=False))
+
+    def predict(self, x):
+        """Class probabilities for one preprocessed (32, 32, 3) image."""
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        key = self._key(x)
+        probs = self._cache_get(key)
+        if probs is None:
+            future = Future()
+            self._queue.put((x, future))
+            probs = future.result()
+            self._cache_put(key, probs)
+        return probs.copy()
+
+    def predict_many(self, images):
+        """Class probabilities for several images with one forward pass for the misses."""
+        images = [np.ascontiguousarray(x, dtype=np.float32) for x in images]
+        keys = [self._key(x) for x in images]
+        results = [self._cache_get(key) for key in keys]
+
+        missing = [i for i, probs in enumerate(results) if probs is None]
+        if missing:
+            probs = self._run(np.stack([images[i] for i in missing]))
+            for i, p in zip(missing, probs):
+                results[i] = p
+                self._cache_put(keys[i], p)
+        return np.stack([p.copy() for p in results]) if results else np.empty((0,))
+
+    def _batch_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            items = [item]
+            deadline = time.monotonic() + self.max_wait
+            stopping = False
+            while len(items) < self.max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                items.append(item)
+
+            try:
+                probs = self._run(np.stack([x for x, _ in items]))
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+            else:
+                for (_, future), p in zip(items, probs):
+                    future.set_result(p)
+
+            if stopping:
+                return
+
+    def stats(self):
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_entries": len(self._cache),
+            "batches": self.batches,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
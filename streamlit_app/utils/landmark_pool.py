@@ -0,0 +1,121 @@
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from utils.landmarkers import (
+    create_face_landmarker,
+    create_hand_landmarker,
+    solutions,
+)
+from utils.landmarks import faces_to_array, hands_to_normalized
+
+
+def default_workers():
+    """Half the cores, between 1 and 4 (each MediaPipe graph runs several threads)."""
+    return max(1, min(4, (os.cpu_count() or 1) // 2))
+
+
+class LandmarkPool:
+    """Fixed set of landmark models shared by every session of the process.
+
+    Models run in static image mode, so any worker can take any session's
+    frame; per-viewer temporal state lives in ``LandmarkSession`` instead.
+    That trades CPU for memory: palm/face detection runs on every frame
+    rather than tracking from the previous one, which is why the pages
+    only use the pool when the viewer opts in.
+    ``submit(rgb)`` returns a Future of ``(landmarks, labels)``: normalized
+    (H, 21, 3) hands with their handedness, or (F, 478, 3) faces and None.
+    ``options`` go to ``create_hand_landmarker``/``create_face_landmarker``.
+    """
+
+    def __init__(self, kind, workers=None, **options):
+        self.kind = kind
+        self.options = options
+        self.workers = workers or default_workers()
+        self.jobs = queue.Queue()
+        # Import MediaPipe once on this thread: workers importing it at the
+        # same time race on the partially initialized package
+        solutions()
+        self.threads = [
+            threading.Thread(target=self._run, daemon=True) for _ in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _create_model(self):
+        if self.kind == "hands":
+            return create_hand_landmarker(static_image_mode=True, **self.options)
+        return create_face_landmarker(static_image_mode=True, **self.options)
+
+    def _to_arrays(self, results):
+        if self.kind == "hands":
+            return hands_to_normalized(
+                results.multi_hand_landmarks, results.multi_handedness
+            )
+        return faces_to_array(results.multi_face_landmarks or []), None
+
+    def _run(self):
+        model = None
+        try:
+            while True:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                rgb, future = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if model is None:
+                        # Built on first use, and again after a failed attempt
+                        model = self._create_model()
+                    future.set_result(self._to_arrays(model.process(rgb)))
+                except Exception as exc:
+                    future.set_exception(exc)
+        finally:
+            if model is not None:
+                model.close()
+
+    def submit(self, rgb):
+        future = Future()
+        self.jobs.put((rgb, future))
+        return future
+
+    def close(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+class LandmarkSession:
+    """One viewer's handle on a LandmarkPool, holding that viewer's temporal state.
+
+    Landmarks are smoothed with an exponential moving average (``smoothing``
+    is the weight kept from the previous frame) while the same hands or
+    faces stay in view; the filter restarts when their number or handedness
+    changes.
+    """
+
+    def __init__(self, pool, smoothing=0.3):
+        self.pool = pool
+        self.smoothing = smoothing
+        self.previous = None
+        self.previous_labels = None
+
+    def process(self, rgb):
+        landmarks, labels = self.pool.submit(rgb).result()
+        same_targets = (
+            self.previous is not None
+            and self.previous.shape == landmarks.shape
+            and (labels is None or np.array_equal(labels, self.previous_labels))
+        )
+        if same_targets and self.smoothing:
+            landmarks = landmarks + self.smoothing * (self.previous - landmarks)
+        self.previous, self.previous_labels = landmarks, labels
+        return landmarks, labels
+
+    def close(self):
+        self.previous = self.previous_labels = None
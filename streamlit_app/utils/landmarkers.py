@@ -0,0 +1,267 @@
+import logging
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from utils.config import MODEL_FACE_LANDMARKER, MODEL_HAND_LANDMARKER
+from utils.imports import import_heavy
+
+logger = logging.getLogger(__name__)
+
+# "solutions" is the legacy mp.solutions graph, "tasks" the MediaPipe Tasks API
+BACKENDS = ["solutions", "tasks"]
+RUNNING_MODES = ["image", "video", "live_stream"]
+
+# UI labels of the (backend, running_mode) pairs offered on the live pages
+BACKEND_CHOICES = {
+    "Solutions (legacy)": ("solutions", "video"),
+    "Tasks API (video)": ("tasks", "video"),
+    "Tasks API (live stream, async)": ("tasks", "live_stream"),
+}
+
+_NO_HANDS = SimpleNamespace(multi_hand_landmarks=None, multi_handedness=None)
+_NO_FACES = SimpleNamespace(multi_face_landmarks=None)
+
+
+def _mediapipe():
+    return import_heavy("mediapipe")
+
+
+def solutions():
+    """Legacy ``mp.solutions`` modules (graphs, connections, drawing utils)."""
+    try:
+        # Some protobuf releases do not expose ``builder`` until it is
+        # imported explicitly, which the solutions' generated code relies on
+        import google.protobuf.internal
+        import google.protobuf.internal.builder
+
+        google.protobuf.internal.builder = google.protobuf.internal.builder
+    except ImportError:
+        pass
+    mp = _mediapipe()
+    try:
+        return mp.solutions
+    except AttributeError:
+        import mediapipe.python.solutions as mp_solutions
+
+        return mp_solutions
+
+
+def _hands_result(result):
+    """HandLandmarkerResult -> the ``multi_hand_landmarks`` layout of solutions."""
+    if result is None or not result.hand_landmarks:
+        return _NO_HANDS
+    return SimpleNamespace(
+        multi_hand_landmarks=[
+            SimpleNamespace(landmark=hand) for hand in result.hand_landmarks
+        ],
+        multi_handedness=[
+            SimpleNamespace(classification=[SimpleNamespace(label=c[0].category_name)])
+            for c in result.handedness
+        ],
+    )
+
+
+def _faces_result(result):
+    """FaceLandmarkerResult -> the ``multi_face_landmarks`` layout of solutions."""
+    if result is None or not result.face_landmarks:
+        return _NO_FACES
+    return SimpleNamespace(
+        multi_face_landmarks=[
+            SimpleNamespace(landmark=face) for face in result.face_landmarks
+        ]
+    )
+
+
+class TasksLandmarker:
+    """MediaPipe Tasks HandLandmarker/FaceLandmarker behind the solutions API.
+
+    ``process(rgb)`` returns results shaped like ``Hands.process`` or
+    ``FaceMesh.process``. In "live_stream" mode the frame is handed to
+    ``detect_async`` and the newest result delivered by the callback is
+    returned, so inference of one frame overlaps the capture of the next;
+    results then lag the frame by about one inference time.
+    """
+
+    def __init__(
+        self, kind, model_path, running_mode="video", delegate="cpu", **options
+    ):
+        mp = _mediapipe()
+        vision = mp.tasks.vision
+        base_options = mp.tasks.BaseOptions(
+            model_asset_path=str(model_path),
+            delegate=getattr(mp.tasks.BaseOptions.Delegate, delegate.upper()),
+        )
+        if kind == "hands":
+            options_cls, landmarker_cls = (
+                vision.HandLandmarkerOptions,
+                vision.HandLandmarker,
+            )
+            self.convert, empty = _hands_result, _NO_HANDS
+        else:
+            options_cls, landmarker_cls = (
+                vision.FaceLandmarkerOptions,
+                vision.FaceLandmarker,
+            )
+            self.convert, empty = _faces_result, _NO_FACES
+
+        self.running_mode = running_mode
+        if running_mode == "live_stream":
+            options["result_callback"] = self._on_result
+        self.landmarker = landmarker_cls.create_from_options(
+            options_cls(
+                base_options=base_options,
+                running_mode=getattr(vision.RunningMode, running_mode.upper()),
+                **options,
+            )
+        )
+        self.mp = mp
+        self.lock = threading.Lock()
+        self.latest = empty
+        self.last_timestamp = -1
+
+    def _timestamp(self):
+        # Tasks reject timestamps that do not strictly increase
+        timestamp = int(time.monotonic() * 1000)
+        self.last_timestamp = max(timestamp, self.last_timestamp + 1)
+        return self.last_timestamp
+
+    def _on_result(self, result, image, timestamp_ms):
+        results = self.convert(result)
+        with self.lock:
+            self.latest = results
+
+    def process(self, rgb):
+        image = self.mp.Image(
+            image_format=self.mp.ImageFormat.SRGB, data=np.ascontiguousarray(rgb)
+        )
+        if self.running_mode == "image":
+            return self.convert(self.landmarker.detect(image))
+        if self.running_mode == "video":
+            return self.convert(
+                self.landmarker.detect_for_video(image, self._timestamp())
+            )
+        self.landmarker.detect_async(image, self._timestamp())
+        with self.lock:
+            return self.latest
+
+    def close(self):
+        self.landmarker.close()
+
+
+def tasks_available(kind):
+    """Whether the Tasks model bundle for ``kind`` ("hands"/"face") is on disk."""
+    model_path = MODEL_HAND_LANDMARKER if kind == "hands" else MODEL_FACE_LANDMARKER
+    return os.path.exists(model_path)
+
+
+def _use_tasks(backend, model_path):
+    if backend != "tasks":
+        return False
+    if not os.path.exists(model_path):
+        logger.warning(
+            "%s not found (see models/download_mediapipe_models.py); "
+            "using the solutions backend",
+            model_path,
+        )
+        return False
+    return True
+
+
+def create_hand_landmarker(
+    backend="solutions",
+    running_mode="video",
+    static_image_mode=False,
+    max_num_hands=2,
+    model_complexity=1,
+    min_detection_confidence=0.5,
+    min_tracking_confidence=0.5,
+    delegate="cpu",
+    model_path=None,
+):
+    """Hand landmark model with a solutions-style ``process``/``close`` API.
+
+    ``model_complexity=0`` selects the lite solutions model; with the Tasks
+    backend a different bundle (e.g. a lite one) is chosen by ``model_path``
+    and ``delegate`` picks "cpu" or "gpu". Falls back to solutions when the
+    Tasks model file is missing.
+    """
+    model_path = model_path or MODEL_HAND_LANDMARKER
+    if _use_tasks(backend, model_path):
+        return TasksLandmarker(
+            "hands",
+            model_path,
+            running_mode="image" if static_image_mode else running_mode,
+            delegate=delegate,
+            num_hands=max_num_hands,
+            min_hand_detection_confidence=min_detection_confidence,
+            min_hand_presence_confidence=min_tracking_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+        )
+    return solutions().hands.Hands(
+        static_image_mode=static_image_mode,
+        max_num_hands=max_num_hands,
+        model_complexity=model_complexity,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence,
+    )
+
+
+def create_face_landmarker(
+    backend="solutions",
+    running_mode="video",
+    static_image_mode=False,
+    max_num_faces=1,
+    min_detection_confidence=0.5,
+    min_tracking_confidence=0.5,
+    delegate="cpu",
+    model_path=None,
+):
+    """478-landmark face model (FaceMesh with iris refinement or FaceLandmarker)."""
+    model_path = model_path or MODEL_FACE_LANDMARKER
+    if _use_tasks(backend, model_path):
+        return TasksLandmarker(
+            "face",
+            model_path,
+            running_mode="image" if static_image_mode else running_mode,
+            delegate=delegate,
+            num_faces=max_num_faces,
+            min_face_detection_confidence=min_detection_confidence,
+            min_face_presence_confidence=min_tracking_confidence,
+            min_tracking_confidence=min_tracking_confidence,
+        )
+    return solutions().face_mesh.FaceMesh(
+        static_image_mode=static_image_mode,
+        max_num_faces=max_num_faces,
+        refine_landmarks=True,
+        min_detection_confidence=min_detection_confidence,
+        min_tracking_confidence=min_tracking_confidence,
+    )
+
+
+def draw_landmarks(image, landmark_list, connections, **specs):
+    """``drawing_utils.draw_landmarks`` for landmarks of either backend.
+
+    Tasks landmarks (plain dataclasses) and (N, 3) arrays of normalized
+    landmarks are copied into the protobuf list the drawing utils expect;
+    this only happens when drawing.
+    """
+    mp_solutions = solutions()
+    if not hasattr(landmark_list, "ListFields"):
+        from mediapipe.framework.formats import landmark_pb2
+
+        if isinstance(landmark_list, np.ndarray):
+            rows = landmark_list.tolist()
+        else:
+            rows = [(lm.x, lm.y, lm.z) for lm in landmark_list.landmark]
+        proto = landmark_pb2.NormalizedLandmarkList()
+        proto.landmark.extend(
+            landmark_pb2.NormalizedLandmark(x=x, y=y, z=z) for x, y, z in rows
+        )
+        landmark_list = proto
+    mp_solutions.drawing_utils.draw_landmarks(
+        image, landmark_list, connections, **specs
+    )
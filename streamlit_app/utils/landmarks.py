@@ -0,0 +1,147 @@
+import numpy as np
+
+# FaceMesh landmark ids, ordered p1..p6 (eyes) and p1..p8 (mouth)
+LEFT_EYE = [362, 385, 387, 263, 373, 380]
+RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+MOUTH = [61, 39, 37, 0, 267, 269, 291, 405]
+
+# Point pairs of the EAR and MAR formulas, as positions within each id list:
+# EAR = (|p2-p6| + |p3-p5|) / (2 * |p1-p4|)
+# MAR = (|p2-p8| + |p3-p7| + |p4-p6|) / (2 * |p1-p5|)
+_EAR_PAIRS = [(1, 5), (2, 4), (0, 3)]
+_MAR_PAIRS = [(1, 7), (2, 6), (3, 5), (0, 4)]
+
+_PAIRS = (
+    [(LEFT_EYE[a], LEFT_EYE[b]) for a, b in _EAR_PAIRS]
+    + [(RIGHT_EYE[a], RIGHT_EYE[b]) for a, b in _EAR_PAIRS]
+    + [(MOUTH[a], MOUTH[b]) for a, b in _MAR_PAIRS]
+)
+# Both ends of every pair in one index array: [starts..., ends...]
+_PAIR_IDS = np.array([a for a, _ in _PAIRS] + [b for _, b in _PAIRS])
+_NUM_PAIRS = len(_PAIRS)
+
+# Every landmark the EAR/MAR metrics read
+METRIC_IDS = sorted(set(LEFT_EYE + RIGHT_EYE + MOUTH))
+
+
+def landmarks_to_array(landmarks, out=None, ids=None):
+    """Copy MediaPipe landmarks (``face_lms.landmark``) into an (N, 3) float32 array.
+
+    Pass the array returned by the previous frame as ``out`` to reuse it
+    instead of allocating a new one. With ``ids`` (e.g. ``METRIC_IDS``) only
+    those rows are filled, which skips most of the per-landmark protobuf
+    access when just the metrics are needed; other rows keep old values.
+    """
+    n = len(landmarks)
+    if out is None or out.shape != (n, 3):
+        out = np.zeros((n, 3), dtype=np.float32)
+    if ids is None:
+        out[:] = [(lm.x, lm.y, lm.z) for lm in landmarks]
+    else:
+        out[ids] = [(lm.x, lm.y, lm.z) for lm in map(landmarks.__getitem__, ids)]
+    return out
+
+
+def faces_to_array(multi_face_landmarks, out=None, ids=None):
+    """Stack several faces (``results.multi_face_landmarks``) into (F, N, 3)."""
+    faces = [face.landmark for face in multi_face_landmarks]
+    shape = (len(faces), len(faces[0]) if faces else 0, 3)
+    if out is None or out.shape != shape:
+        out = np.zeros(shape, dtype=np.float32)
+    for face, face_out in zip(faces, out):
+        landmarks_to_array(face, face_out, ids)
+    return out
+
+
+def _ratio(numerator, denominator):
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros_like(numerator),
+        where=denominator > 0,
+    )
+
+
+def eye_mouth_ratios(points, width, height):
+    """EAR of both eyes and MAR from normalized landmarks of shape (..., N, 3).
+
+    All ten distances come from one fancy-indexed gather, so a single face,
+    a batch of faces or a whole video ((frames, faces, N, 3)) cost the same
+    number of NumPy calls. Returns ``(left_ear, right_ear, mar)`` with the
+    leading batch shape of ``points``; a zero denominator yields 0.
+    """
+    points = np.asarray(points, dtype=np.float32)
+    pts = points[..., _PAIR_IDS, :2] * np.array([width, height], dtype=np.float32)
+    diff = pts[..., :_NUM_PAIRS, :] - pts[..., _NUM_PAIRS:, :]
+    d = np.sqrt(np.einsum("...ij,...ij->...i", diff, diff))
+
+    left_ear = _ratio(d[..., 0] + d[..., 1], 2.0 * d[..., 2])
+    right_ear = _ratio(d[..., 3] + d[..., 4], 2.0 * d[..., 5])
+    mar = _ratio(d[..., 6] + d[..., 7] + d[..., 8], 2.0 * d[..., 9])
+    return left_ear, right_ear, mar
+
+
+# Hand landmarks: fingertips and the joint each tip is compared against
+_FINGER_TIPS = [8, 12, 16, 20]
+_FINGER_PIPS = [6, 10, 14, 18]
+_THUMB_TIP, _THUMB_IP = 4, 3
+
+
+def hands_to_normalized(multi_hand_landmarks, multi_handedness):
+    """Normalized (H, 21, 3) landmarks of every detected hand plus their labels."""
+    if not multi_hand_landmarks:
+        return np.empty((0, 21, 3)), np.empty(0, dtype="<U5")
+
+    # float64 so truncation matches int(lm.x * width) of the original scripts
+    raw = np.array(
+        [[(lm.x, lm.y, lm.z) for lm in hand.landmark] for hand in multi_hand_landmarks]
+    )
+    handedness = np.array([h.classification[0].label for h in multi_handedness])
+    return raw, handedness
+
+
+def scale_hands(raw, handedness, width, height, flip_side=False, offset=(0, 0)):
+    """Pixel coordinates of normalized hand landmarks; see ``hands_to_array``."""
+    coords = raw * np.array([width, height, width]) + np.array([*offset, 0])
+    coords = coords.astype(np.int32)
+    if flip_side:
+        handedness = np.where(handedness == "Left", "Right", "Left")
+    return coords, handedness
+
+
+def hands_to_array(
+    multi_hand_landmarks,
+    multi_handedness,
+    width,
+    height,
+    flip_side=False,
+    offset=(0, 0),
+):
+    """Pixel coordinates of every detected hand plus their handedness labels.
+
+    Returns ``(coords, handedness)``: an (H, 21, 3) int32 array with x, y
+    scaled to the frame and z scaled by the width (as in the original
+    scripts), and an (H,) array of "Left"/"Right" labels, swapped when
+    ``flip_side`` is set. When the landmarks come from a crop, ``width`` and
+    ``height`` are the crop size and ``offset`` its (x, y) origin in the
+    full frame.
+    """
+    raw, handedness = hands_to_normalized(multi_hand_landmarks, multi_handedness)
+    return scale_hands(raw, handedness, width, height, flip_side, offset)
+
+
+def fingers_up(coords, handedness):
+    """Boolean (..., 5) array of raised fingers, thumb first.
+
+    Works on one hand ((21, 3) and a label), the hands of a frame
+    ((H, 21, 3) and (H,)) or a whole recording ((frames, H, 21, 3)).
+    """
+    coords = np.asarray(coords)
+    x, y = coords[..., 0], coords[..., 1]
+    thumb = np.where(
+        np.asarray(handedness) == "Right",
+        x[..., _THUMB_TIP] < x[..., _THUMB_IP],
+        x[..., _THUMB_TIP] > x[..., _THUMB_IP],
+    )
+    others = y[..., _FINGER_TIPS] < y[..., _FINGER_PIPS]
+    return np.concatenate([thumb[..., None], others], axis=-1)
@@ -1,8 +1,16 @@
 import streamlit as st
+import json
 import os
 
-import tensorflow as tf
-from utils.config import MODEL_CIFAR10
+from utils.config import (
+    LANDMARK_WORKERS,
+    MODEL_CIFAR10,
+    MODEL_CIFAR10_TFLITE,
+    MODEL_CIFAR10_TFLITE_REPORT,
+)
+from utils.imports import IMPORT_TIMES, import_heavy  # noqa: F401
+from utils.inference import InferenceService, TFLiteClassifier
+from utils.landmark_pool import LandmarkPool
 
 
 @st.cache_resource(show_spinner="Loading Keras Model...")
@@ -11,9 +19,67 @@ def load_cifar10_model():
     if not os.path.exists(MODEL_CIFAR10):
         return None
 
+    tf = import_heavy("tensorflow")
     return tf.keras.models.load_model(MODEL_CIFAR10)
 
 
+@st.cache_resource(show_spinner="Loading TFLite Model...")
+def load_cifar10_tflite_model(precision):
+    """Load an exported float16/int8 TFLite model (see models/export_tflite.py)."""
+    model_path = MODEL_CIFAR10_TFLITE.get(precision)
+    if model_path is None or not os.path.exists(model_path):
+        return None
+
+    return TFLiteClassifier(model_path)
+
+
+def get_cifar10_backends():
+    """Inference backends whose model files are available."""
+    backends = ["keras"] if os.path.exists(MODEL_CIFAR10) else []
+    backends += [p for p, path in MODEL_CIFAR10_TFLITE.items() if os.path.exists(path)]
+    return backends
+
+
+@st.cache_data(show_spinner=False)
+def get_tflite_report():
+    """Accuracy of each TFLite model against the .h5 model, if it was exported."""
+    if not os.path.exists(MODEL_CIFAR10_TFLITE_REPORT):
+        return None
+
+    with open(MODEL_CIFAR10_TFLITE_REPORT) as f:
+        return json.load(f)
+
+
+@st.cache_resource(show_spinner=False)
+def get_inference_service(backend="keras"):
+    """Process-wide batched, cached inference front-end for the CIFAR-10 model."""
+    if backend == "keras":
+        model = load_cifar10_model()
+    else:
+        model = load_cifar10_tflite_model(backend)
+    if model is None:
+        return None
+
+    return InferenceService(model)
+
+
+@st.cache_resource(show_spinner=False)
+def get_landmark_pool(kind, backend="solutions", model_complexity=1):
+    """Process-wide hand ("hands") or face ("face") landmark models for live pages.
+
+    Every session streaming the webcam shares these workers instead of
+    loading its own model; sessions keep their own state in a
+    ``LandmarkSession``.
+    """
+    if kind == "hands":
+        options = {"model_complexity": model_complexity}
+    else:
+        options = {"max_num_faces": 1}
+    return LandmarkPool(
+        kind, workers=LANDMARK_WORKERS or None, backend=backend, **options
+    )
+
+
 def get_cifar10_class_names():
     return [
         "Airplane",
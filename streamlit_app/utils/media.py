@@ -0,0 +1,125 @@
+import base64
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.config import (
+    BASE_DIR,
+    MEDIA_CACHE_MAX_BYTES,
+    MEDIA_INLINE_MAX_BYTES,
+    MEDIA_MANIFEST,
+    STATIC_MEDIA_DIR,
+)
+
+# URL of STATIC_MEDIA_DIR, relative to the page like Streamlit's own examples
+STATIC_MEDIA_URL = "app/static/media"
+PLACEHOLDER_URL = "https://via.placeholder.com/600x250.png?text=FEED+LOST"
+
+
+class ByteLRUCache:
+    """Thread-safe LRU mapping bounded by the total size of its values in bytes.
+
+    Values larger than ``max_item_bytes`` are returned to the caller but not
+    stored, so one big file cannot flush everything else.
+    """
+
+    def __init__(self, max_bytes, max_item_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes or max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if len(value) > self.max_item_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._items[key] = value
+            self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._items), "bytes": self.size}
+
+
+_INLINE_CACHE = ByteLRUCache(MEDIA_CACHE_MAX_BYTES, MEDIA_INLINE_MAX_BYTES)
+_manifest = {"mtime": None, "entries": {}}
+
+
+def load_manifest():
+    """Built media (scripts/build_media.py) keyed by source path under the app dir.
+
+    The file is read again only when it changes on disk.
+    """
+    try:
+        mtime = os.path.getmtime(MEDIA_MANIFEST)
+    except OSError:
+        return {}
+    if mtime != _manifest["mtime"]:
+        with open(MEDIA_MANIFEST) as f:
+            _manifest["entries"] = json.load(f)
+        _manifest["mtime"] = mtime
+    return _manifest["entries"]
+
+
+def manifest_key(image_path):
+    return os.path.relpath(os.path.abspath(image_path), BASE_DIR).replace(os.sep, "/")
+
+
+def static_url(image_path):
+    """Content-hashed URL of the built version of ``image_path``, if there is one.
+
+    The ``v`` query makes Streamlit's static handler (Tornado) send
+    long-lived cache headers; a rebuild changes the hash and the URL.
+    """
+    entry = load_manifest().get(manifest_key(image_path))
+    if entry is None or not os.path.exists(STATIC_MEDIA_DIR / entry["file"]):
+        return None
+    return f"{STATIC_MEDIA_URL}/{entry['file']}?v={entry['hash']}"
+
+
+def inline_src(image_path):
+    """Base64 data URI of a local file, kept in the byte-limited LRU cache."""
+    abs_path = os.path.abspath(image_path)
+    key = (abs_path, os.path.getmtime(abs_path))
+    src = _INLINE_CACHE.get(key)
+    if src is None:
+        with open(abs_path, "rb") as img_file:
+            encoded = base64.b64encode(img_file.read()).decode()
+        ext = abs_path.split(".")[-1]
+        src = f"data:image/{ext};base64,{encoded}"
+        _INLINE_CACHE.put(key, src)
+    return src
+
+
+def media_src(image_path):
+    """``src`` for an <img>: the static URL of the built file, else a data URI.
+
+    Inlining is the fallback for assets that were not built or when static
+    serving is disabled.
+    """
+    if image_path.startswith("http"):
+        return image_path
+    if not os.path.exists(image_path):
+        return PLACEHOLDER_URL
+    if st.get_option("server.enableStaticServing"):
+        url = static_url(image_path)
+        if url is not None:
+            return url
+    return inline_src(image_path)
@@ -0,0 +1,173 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from utils.traffic import VehicleCounter
+from utils.video import FrameSource
+
+
+class StreamScheduler:
+    """Runs many traffic cameras over a fixed pool of worker threads.
+
+    Every stream owns its ``FrameSource`` and ``VehicleCounter`` (and so its
+    own background model). Streams wait in a queue ordered by their next due
+    time: a stream with a ``target_fps`` is not served before its interval has
+    elapsed, and streams that are due are served first-come first-served, so
+    no feed starves the others. A stream is only ever processed by one worker
+    at a time, keeping its subtractor state consistent.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.streams = {}
+        self._queue = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._threads = []
+        self._running = False
+
+    def add_stream(self, stream_id, source, target_fps=None, **counter_kwargs):
+        """Register a video path or camera index under ``stream_id``."""
+        stream = {
+            "source": FrameSource(source),
+            "counter": VehicleCounter(**counter_kwargs),
+            "target_fps": target_fps,
+            "interval": 1.0 / target_fps if target_fps else 0.0,
+            "status": "running",
+            "busy": False,
+            "fps": 0.0,
+            "last_update": None,
+        }
+        with self._condition:
+            replaced = self._remove(stream_id)
+            self.streams[stream_id] = stream
+            self._push(stream_id, stream, time.monotonic())
+        if replaced is not None:
+            replaced.release()
+
+    def remove_stream(self, stream_id):
+        with self._condition:
+            source = self._remove(stream_id)
+        if source is not None:
+            source.release()
+
+    def _remove(self, stream_id):
+        """Drop ``stream_id`` and return the source the caller must release.
+
+        Releasing joins the decode thread, so it happens after the lock is
+        dropped. A worker holding the stream releases it once it is done.
+        """
+        stream = self.streams.pop(stream_id, None)
+        if stream is None:
+            return None
+        stream["status"] = "removed"
+        return None if stream["busy"] else stream["source"]
+
+    def _push(self, stream_id, stream, due):
+        heapq.heappush(self._queue, (due, next(self._order), stream_id, stream))
+        self._condition.notify()
+
+    def start(self):
+        with self._condition:
+            if self._running:
+                return
+            self._running = True
+        self._threads = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        with self._condition:
+            sources = [self._remove(stream_id) for stream_id in list(self.streams)]
+            self._queue = []
+        for source in sources:
+            if source is not None:
+                source.release()
+
+    def _next_stream(self):
+        """Block until a stream is due and return ``(id, stream)``, or None on stop.
+
+        The stream dict is taken under the lock that marks it busy, so a
+        concurrent ``remove_stream`` cannot make the lookup fail. Entries of
+        a stream that was removed or replaced under the same id are skipped.
+        """
+        with self._condition:
+            while self._running:
+                now = time.monotonic()
+                if self._queue and self._queue[0][0] <= now:
+                    _, _, stream_id, stream = heapq.heappop(self._queue)
+                    if self.streams.get(stream_id) is stream and not stream["busy"]:
+                        stream["busy"] = True
+                        return stream_id, stream
+                    continue
+                timeout = self._queue[0][0] - now if self._queue else None
+                self._condition.wait(timeout)
+            return None
+
+    def _work(self):
+        while True:
+            job = self._next_stream()
+            if job is None:
+                return
+            stream_id, stream = job
+
+            started = time.monotonic()
+            ret, frame = stream["source"].read(timeout=1.0)
+            if not ret:
+                with self._condition:
+                    stream["busy"] = False
+                    if stream["status"] == "running" and stream["source"].finished:
+                        stream["status"] = "finished"
+                    done = stream["status"] != "running"
+                    if not done:
+                        self._push(stream_id, stream, time.monotonic())
+                if done:
+                    stream["source"].release()
+                continue
+
+            stream["counter"].process(frame)
+
+            with self._condition:
+                now = time.monotonic()
+                if stream["last_update"] is not None:
+                    instant = 1.0 / max(now - stream["last_update"], 1e-6)
+                    stream["fps"] = 0.9 * stream["fps"] + 0.1 * instant
+                stream["last_update"] = now
+                stream["busy"] = False
+                done = stream["status"] != "running"
+                if not done:
+                    self._push(
+                        stream_id, stream, max(now, started + stream["interval"])
+                    )
+            if done:
+                stream["source"].release()
+
+    def snapshot(self):
+        """Per-stream counts and throughput, safe to poll from the dashboard."""
+        with self._condition:
+            return {
+                stream_id: {
+                    "count": stream["counter"].vehicle_count,
+                    "frames": stream["counter"].frame_index + 1,
+                    "fps": round(stream["fps"], 1),
+                    "target_fps": stream["target_fps"],
+                    "dropped": stream["source"].stats()["dropped"],
+                    "status": stream["status"],
+                }
+                for stream_id, stream in self.streams.items()
+            }
+
+    def total_count(self):
+        with self._condition:
+            return sum(s["counter"].vehicle_count for s in self.streams.values())
@@ -0,0 +1,297 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import streamlit as st
+
+from utils.config import STREAM_HOST, STREAM_PORT, STREAM_URL
+from utils.video import FrameSource, RenderThrottle
+
+BOUNDARY = "frame"
+
+
+class LiveStream:
+    """Capture + analysis thread that publishes JPEG frames and metrics.
+
+    ``process(frame, render)`` runs on every captured frame and returns
+    ``(frame, metrics)``; ``render`` is False when the frame will not be sent
+    (no viewer connected or above ``display_fps``), so drawing can be
+    skipped. Frames are JPEG-encoded once, whatever the number of viewers.
+    Only the newest frame is kept: viewers that fall behind skip frames
+    instead of queueing them (backpressure). The stream stops by itself once
+    nobody has watched or polled it for ``idle_timeout`` seconds, so a
+    closed browser tab does not keep the camera open.
+    """
+
+    def __init__(
+        self,
+        source,
+        process,
+        jpeg_quality=80,
+        display_fps=15,
+        on_close=None,
+        idle_timeout=30.0,
+    ):
+        self.source = source
+        self.process = process
+        self.jpeg_quality = int(jpeg_quality)
+        self.display_fps = display_fps
+        self.on_close = on_close
+        self.idle_timeout = idle_timeout
+        self.last_seen = time.monotonic()
+
+        self.condition = threading.Condition()
+        self.jpeg = None
+        self.seq = 0
+        self.metrics = {}
+        self.clients = 0
+        self.running = False
+        self._stopped = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+        return self
+
+    def _run(self):
+        cap = FrameSource(self.source, latest_only=True)
+        throttle = RenderThrottle(self.display_fps)
+        encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+        try:
+            while not self._stopped and cap.isOpened():
+                if (
+                    self.clients == 0
+                    and time.monotonic() - self.last_seen > self.idle_timeout
+                ):
+                    break
+                ret, frame = cap.read(timeout=1.0)
+                if not ret:
+                    if cap.finished:
+                        break
+                    continue
+
+                render = self.clients > 0 and throttle.due()
+                frame, metrics = self.process(frame, render)
+                metrics["analysis_fps"] = round(throttle.tick(), 1)
+
+                jpeg = None
+                if render:
+                    ok, buffer = cv2.imencode(".jpg", frame, encode_params)
+                    jpeg = buffer.tobytes() if ok else None
+                with self.condition:
+                    self.metrics = metrics
+                    if jpeg is not None:
+                        self.jpeg = jpeg
+                        self.seq += 1
+                    self.condition.notify_all()
+        finally:
+            cap.release()
+            if self.on_close is not None:
+                self.on_close()
+            with self.condition:
+                self.running = False
+                self.condition.notify_all()
+
+    def wait_frame(self, last_seq, timeout=1.0):
+        """Block until a frame newer than ``last_seq`` exists; returns ``(seq, jpeg)``."""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.seq != last_seq or not self.running, timeout
+            )
+            return self.seq, self.jpeg
+
+    def add_client(self, delta):
+        with self.condition:
+            self.clients += delta
+            self.last_seen = time.monotonic()
+
+    def snapshot(self):
+        with self.condition:
+            self.last_seen = time.monotonic()
+            return {**self.metrics, "running": self.running, "viewers": self.clients}
+
+    def stop(self):
+        self._stopped = True
+        if self.thread.is_alive():
+            self.thread.join()
+
+
+class _StreamHandler(BaseHTTPRequestHandler):
+    """``/<id>.mjpg`` streams frames, ``/<id>.json`` returns the latest metrics."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stream_id, _, ext = self.path.strip("/").partition(".")
+        stream = self.server.streams.get(stream_id)
+        if stream is None:
+            self.send_error(404)
+            return
+        if ext == "json":
+            self._send_metrics(stream)
+        elif ext == "mjpg":
+            self._send_mjpeg(stream)
+        else:
+            self.send_error(404)
+
+    def _send_metrics(self, stream):
+        body = json.dumps(stream.snapshot()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_mjpeg(self, stream):
+        self.send_response(200)
+        self.send_header(
+            "Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}"
+        )
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        stream.add_client(1)
+        seq = 0
+        try:
+            while stream.running:
+                new_seq, jpeg = stream.wait_frame(seq)
+                if new_seq == seq or jpeg is None:
+                    continue
+                seq = new_seq
+                # A slow socket blocks here; frames published meanwhile are
+                # skipped and the next write sends the newest one
+                self.wfile.write(
+                    f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                    f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n"
+                )
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            stream.add_client(-1)
+
+
+class MJPEGServer:
+    """HTTP server (one per process) that exposes every registered LiveStream."""
+
+    def __init__(self, host="127.0.0.1", port=STREAM_PORT):
+        self.httpd = ThreadingHTTPServer((host, port), _StreamHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.streams = {}
+        self.port = self.httpd.server_address[1]
+        self.lock = threading.Lock()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def register(self, stream_id, stream):
+        """Start ``stream`` under ``stream_id``, stopping the one it replaces first.
+
+        The entry is dropped when the stream ends, including when it stops
+        by itself (idle timeout, end of file or camera lost).
+        """
+        on_close = stream.on_close
+
+        def close():
+            try:
+                if on_close is not None:
+                    on_close()
+            finally:
+                self._forget(stream_id, stream)
+
+        stream.on_close = close
+        with self.lock:
+            previous = self.httpd.streams.get(stream_id)
+            self.httpd.streams[stream_id] = stream
+        if previous is not None:
+            # Frees the camera before the new stream opens it
+            previous.stop()
+        return stream.start()
+
+    def _forget(self, stream_id, stream):
+        # Only if the id was not taken over by a newer stream meanwhile
+        with self.lock:
+            if self.httpd.streams.get(stream_id) is stream:
+                del self.httpd.streams[stream_id]
+
+    def unregister(self, stream_id):
+        with self.lock:
+            stream = self.httpd.streams.pop(stream_id, None)
+        if stream is not None:
+            stream.stop()
+
+    def get(self, stream_id):
+        return self.httpd.streams.get(stream_id)
+
+    def close(self):
+        for stream_id in list(self.httpd.streams):
+            self.unregister(stream_id)
+        self.httpd.shutdown()
+
+
+@st.cache_resource(show_spinner=False)
+def get_mjpeg_server():
+    """One MJPEG server per Streamlit process, shared by every page and session.
+
+    It listens where Streamlit does (``server.address``) unless
+    ``STREAM_HOST`` is set, and on loopback when neither is.
+    """
+    host = STREAM_HOST or st.get_option("server.address") or "127.0.0.1"
+    return MJPEGServer(host)
+
+
+def player_html(stream_id, port, metrics, height=480):
+    """Video element plus metric cards that poll ``/<id>.json`` in the browser.
+
+    ``metrics`` maps card labels to keys of the stream metrics. Nothing runs
+    in the Streamlit script while the stream plays. The stream is read from
+    ``STREAM_URL`` when set, else over plain HTTP from the page's host.
+    """
+    base_url = json.dumps(STREAM_URL.rstrip("/") if STREAM_URL else None)
+    cards = "".join(
+        f'<div class="card"><div class="label">{label}</div>'
+        f'<div class="value" data-key="{key}">—</div></div>'
+        for label, key in metrics.items()
+    )
+    return f"""
+    <style>
+      body {{ margin: 0; font-family: sans-serif; color: #F9FAFB; }}
+      .wrap {{ display: flex; gap: 16px; }}
+      .wrap img {{ flex: 2; max-width: 66%; max-height: {height}px;
+                   object-fit: contain; border-radius: 8px; background: #111827; }}
+      .cards {{ flex: 1; display: flex; flex-direction: column; gap: 12px; }}
+      .label {{ color: #9CA3AF; font-size: 1.1rem; }}
+      .value {{ color: #10B981; font-size: 2.2rem; }}
+    </style>
+    <div class="wrap">
+      <img id="feed" alt="Live feed">
+      <p id="notice" hidden>The live stream is served over plain HTTP, which
+        this HTTPS page cannot load. Set CV_HUB_STREAM_URL to an HTTPS proxy
+        of the stream server.</p>
+      <div class="cards">{cards}</div>
+    </div>
+    <script>
+      const {{ protocol, hostname }} = window.parent.location;
+      const base = ({base_url} ||
+        `http://${{hostname || "localhost"}}:{port}`) + "/{stream_id}";
+      if (protocol === "https:" && base.startsWith("http:")) {{
+        document.getElementById("notice").hidden = false;
+      }}
+      document.getElementById("feed").src = `${{base}}.mjpg`;
+      async function poll() {{
+        try {{
+          const metrics = await (await fetch(`${{base}}.json`)).json();
+          document.querySelectorAll(".value").forEach((el) => {{
+            const value = metrics[el.dataset.key];
+            if (value !== undefined) el.textContent = value;
+          }});
+          if (!metrics.running) return;
+        }} catch (e) {{}}
+        setTimeout(poll, 500);
+      }}
+      poll();
+    </script>
+    """
@@ -1,14 +1,30 @@
 import cv2
+import logging
 import numpy as np
 import os
 
+from utils.video import FrameSource
+
+logger = logging.getLogger(__name__)
+
+# Minimum rectangle size for detection and counting line geometry
+MIN_WIDTH = 40
+MIN_HEIGHT = 40
+PIXEL_OFFSET = 2
+ROI_LINE = 620
+LINE_X_START = 25
+LINE_X_END = 1200
+
+
+_KERNELS = {
+    "dilation": cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3)),
+    "opening": np.ones((3, 3), np.uint8),
+    "closing": np.ones((3, 3), np.uint8),
+}
+
 
 def get_kernel(kernel_type):
-    if kernel_type == "dilation":
-        return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-    if kernel_type in ["opening", "closing"]:
-        return np.ones((3, 3), np.uint8)
-    return None
+    return _KERNELS.get(kernel_type)
 
 
 def apply_filter(img, filter_type):
@@ -34,6 +50,81 @@ def apply_filter(img, filter_type):
     return img
 
 
+class MorphologyPipeline:
+    """``apply_filter(img, "combine")`` with kernels built once and reused buffers.
+
+    Modes:
+        - ``"exact"``: the same closing/opening/dilation passes (2 iterations each).
+        - ``"single"``: one 3x3 iteration per step. On Arco.mp4 the filtering
+          is about 20% faster (0.6 ms per 720p frame, ~1% of the whole
+          pipeline) but about 8% of the mask pixels differ from ``"exact"``
+          and the MOG2 count drops from 17 to 12; measure with
+          ``compare_morphology`` or ``scripts/benchmark_traffic.py --morphology``.
+
+    The returned mask is an internal buffer overwritten by the next call.
+    """
+
+    MODES = ["exact", "single"]
+
+    def __init__(self, mode="exact"):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown morphology mode: {mode}")
+        self.mode = mode
+        self.iterations = 1 if mode == "single" else 2
+        self.rect_kernel = get_kernel("closing")
+        self.dilation_kernel = get_kernel("dilation")
+        self._buffers = None
+
+    def apply(self, mask):
+        if self._buffers is None or self._buffers[0].shape != mask.shape:
+            self._buffers = (np.empty_like(mask), np.empty_like(mask))
+        a, b = self._buffers
+
+        cv2.morphologyEx(
+            mask,
+            cv2.MORPH_CLOSE,
+            self.rect_kernel,
+            dst=a,
+            iterations=self.iterations,
+        )
+        cv2.morphologyEx(
+            a, cv2.MORPH_OPEN, self.rect_kernel, dst=b, iterations=self.iterations
+        )
+        cv2.dilate(b, self.dilation_kernel, dst=a, iterations=self.iterations)
+        return a
+
+
+def compare_morphology(masks, mode):
+    """Measure a pipeline mode against ``apply_filter(mask, "combine")``.
+
+    Returns the fraction of mismatching pixels and the mean time per mask (ms)
+    of both implementations.
+    """
+    pipeline = MorphologyPipeline(mode)
+    count, mismatched, total = 0, 0, 0
+    reference_time, pipeline_time = 0.0, 0.0
+    for mask in masks:
+        start = cv2.getTickCount()
+        expected = apply_filter(mask, "combine")
+        middle = cv2.getTickCount()
+        result = pipeline.apply(mask)
+        end = cv2.getTickCount()
+
+        reference_time += middle - start
+        pipeline_time += end - middle
+        mismatched += np.count_nonzero(expected != result)
+        total += mask.size
+        count += 1
+
+    to_ms = 1000.0 / cv2.getTickFrequency() / max(1, count)
+    return {
+        "mode": mode,
+        "mismatch_ratio": mismatched / total if total else 0.0,
+        "reference_ms": reference_time * to_ms,
+        "pipeline_ms": pipeline_time * to_ms,
+    }
+
+
 def get_subtractor(algorithm_type):
     if algorithm_type == "KNN":
         return cv2.createBackgroundSubtractorKNN()
@@ -48,6 +139,30 @@ def get_subtractor(algorithm_type):
     return cv2.createBackgroundSubtractorMOG2()
 
 
+def subtractor_warmup(algorithm_type="MOG2"):
+    """Frames a fresh background model needs before its masks match a settled one.
+
+    That is the model's history (MOG2/KNN 500, MOG 200), GMG's 120
+    initialization frames plus about three time constants of its learning
+    rate, or CNT's maximum pixel stability.
+    """
+    subtractor = get_subtractor(algorithm_type)
+    if hasattr(subtractor, "getHistory"):
+        return subtractor.getHistory()
+    if hasattr(subtractor, "getNumFrames"):
+        return subtractor.getNumFrames() + round(
+            3 / subtractor.getDefaultLearningRate()
+        )
+    return subtractor.getMaxPixelStability()
+
+
+# Background models that reach the state of a sequential run within
+# subtractor_warmup() frames. After 1500 frames of warm-up MOG2, KNN and CNT
+# masks still differed in 4-12% of the pixels and MOG in 0.1%, so they are
+# counted sequentially
+PARALLEL_ALGORITHMS = ["GMG"]
+
+
 def get_centroid(x, y, w, h):
     """Calculate the centroid of a rectangle."""
     cx = x + w // 2
@@ -55,6 +170,447 @@ def get_centroid(x, y, w, h):
     return cx, cy
 
 
+def _box_iou(boxes_a, boxes_b):
+    """Pairwise IoU between (N, 4) and (M, 4) arrays of x, y, w, h boxes."""
+    a = boxes_a.astype(np.float32)
+    b = boxes_b.astype(np.float32)
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+    inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+    area_a = a[:, 2] * a[:, 3]
+    area_b = b[:, 2] * b[:, 3]
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def _greedy_match(cost, valid):
+    """Match rows to columns by ascending cost, each used at most once."""
+    rows, cols = np.nonzero(valid)
+    order = np.argsort(cost[rows, cols], kind="stable")
+    used_rows, used_cols, matches = set(), set(), []
+    for k in order:
+        r, c = int(rows[k]), int(cols[k])
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matches.append((r, c))
+    return matches
+
+
+def _hungarian_match(cost, valid):
+    """Globally optimal assignment (requires scipy, shipped with scikit-learn)."""
+    from scipy.optimize import linear_sum_assignment
+
+    rows, cols = linear_sum_assignment(np.where(valid, cost, 1e9))
+    return [(int(r), int(c)) for r, c in zip(rows, cols) if valid[r, c]]
+
+
+class CentroidTracker:
+    """Multi-object tracker that associates boxes between frames.
+
+    A detection matches a track when their centroids are within
+    ``max_distance`` pixels or their boxes overlap by ``min_iou``. Tracks not
+    matched for more than ``max_missed`` frames are dropped, so memory is
+    bounded by the number of vehicles currently in view.
+    """
+
+    def __init__(self, max_distance=60, min_iou=0.3, max_missed=5, matching="greedy"):
+        self.max_distance = max_distance
+        self.min_iou = min_iou
+        self.max_missed = max_missed
+        self.match = _hungarian_match if matching == "hungarian" else _greedy_match
+        self.next_id = 0
+        self.tracks = {}
+
+    def update(self, boxes):
+        """Update tracks with this frame's boxes and return the tracks seen in it."""
+        boxes = np.asarray(boxes, np.int32).reshape(-1, 4)
+        centroids = boxes[:, :2] + boxes[:, 2:] // 2
+        track_ids = list(self.tracks)
+
+        matches = []
+        if track_ids and len(boxes):
+            prev_boxes = np.array([self.tracks[i]["box"] for i in track_ids], np.int32)
+            prev_centroids = np.array(
+                [self.tracks[i]["centroid"] for i in track_ids], np.int32
+            )
+            dist = np.linalg.norm(
+                (prev_centroids[:, None, :] - centroids[None, :, :]).astype(np.float32),
+                axis=2,
+            )
+            valid = (dist <= self.max_distance) | (
+                _box_iou(prev_boxes, boxes) >= self.min_iou
+            )
+            matches = self.match(dist, valid)
+
+        seen = []
+        matched_rows, matched_cols = set(), set()
+        for r, c in matches:
+            track = self.tracks[track_ids[r]]
+            track["previous"] = track["centroid"]
+            track["centroid"] = tuple(centroids[c].tolist())
+            track["box"] = tuple(boxes[c].tolist())
+            track["missed"] = 0
+            matched_rows.add(r)
+            matched_cols.add(c)
+            seen.append(track)
+
+        for r, track_id in enumerate(track_ids):
+            if r in matched_rows:
+                continue
+            self.tracks[track_id]["missed"] += 1
+            if self.tracks[track_id]["missed"] > self.max_missed:
+                del self.tracks[track_id]
+
+        for c in range(len(boxes)):
+            if c in matched_cols:
+                continue
+            track = {
+                "id": self.next_id,
+                "box": tuple(boxes[c].tolist()),
+                "centroid": tuple(centroids[c].tolist()),
+                "previous": None,
+                "missed": 0,
+                "counted": False,
+            }
+            self.tracks[self.next_id] = track
+            self.next_id += 1
+            seen.append(track)
+
+        return seen
+
+
+def iter_frames(source):
+    """Yield BGR frames from a video path, an opened VideoCapture or any iterable.
+
+    Paths and captures are decoded ahead on a ``FrameSource`` thread.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        source = cv2.VideoCapture(str(source))
+
+    if isinstance(source, cv2.VideoCapture):
+        with FrameSource(source) as frames:
+            yield from frames
+        return
+
+    yield from source
+
+
+class VehicleCounter:
+    """Headless vehicle counter: background subtraction plus ROI line crossing.
+
+    Holds no GUI state, so it can back the Streamlit page, the standalone
+    script and batch jobs over long recordings alike.
+    """
+
+    def __init__(
+        self,
+        algorithm_type="MOG2",
+        filter_type="combine",
+        min_width=MIN_WIDTH,
+        min_height=MIN_HEIGHT,
+        roi_line=ROI_LINE,
+        pixel_offset=PIXEL_OFFSET,
+        tracker=None,
+        scale=1.0,
+        morphology_mode="exact",
+        regions=None,
+        warmup_frames=1,
+    ):
+        self.algorithm_type = algorithm_type
+        self.filter_type = filter_type
+        self.min_width = min_width
+        self.min_height = min_height
+        self.roi_line = roi_line
+        self.pixel_offset = pixel_offset
+        self.scale = scale
+        self.morphology_mode = morphology_mode
+        self.regions = [self._make_region(region) for region in (regions or [None])]
+        self.warmup_frames = warmup_frames
+        self.vehicle_count = 0
+        self.frame_index = -1
+        self.frames_processed = 0
+        self.tracker = tracker or CentroidTracker()
+
+    def _make_region(self, region):
+        """Build the per-region state: crop rect, optional polygon and subtractor."""
+        rect, polygon = None, None
+        if region is not None:
+            points = np.asarray(region)
+            if points.ndim == 2:
+                polygon = points.astype(np.int32)
+                region = cv2.boundingRect(polygon)
+            x, y, w, h = region
+            rect = (max(0, x), max(0, y), w, h)
+
+        return {
+            "rect": rect,
+            "polygon": polygon,
+            "polygon_mask": None,
+            "subtractor": get_subtractor(self.algorithm_type),
+            "morphology": (
+                MorphologyPipeline(self.morphology_mode)
+                if self.filter_type == "combine"
+                else None
+            ),
+        }
+
+    def detect(self, frame):
+        """Return the bounding boxes of moving objects large enough to be vehicles.
+
+        With ``scale`` below 1 subtraction, morphology and contours run on a
+        downscaled frame and the boxes are projected back to full resolution,
+        so the ROI line and size thresholds keep their original values. With
+        ``regions`` only those crops are processed, each with its own
+        background model, and boxes are mapped back to frame coordinates.
+        """
+        boxes = []
+        for region in self.regions:
+            boxes.extend(self._detect_region(frame, region))
+        return boxes
+
+    def _detect_region(self, frame, region):
+        offset_x, offset_y = 0, 0
+        if region["rect"] is not None:
+            offset_x, offset_y, w, h = region["rect"]
+            frame = frame[
+                offset_y : None if h is None else offset_y + h,
+                offset_x : None if w is None else offset_x + w,
+            ]
+
+        # Slicing clamps the region to the frame; one lying outside it (e.g.
+        # the line band of a video shorter than the line) has nothing to detect
+        if min(frame.shape[:2]) * self.scale < 1:
+            return []
+
+        if self.scale != 1.0:
+            frame = cv2.resize(
+                frame,
+                None,
+                fx=self.scale,
+                fy=self.scale,
+                interpolation=cv2.INTER_AREA,
+            )
+        mask = region["subtractor"].apply(frame)
+
+        if region["polygon"] is not None:
+            if region["polygon_mask"] is None:
+                points = (region["polygon"] - (offset_x, offset_y)) * self.scale
+                region["polygon_mask"] = np.zeros(mask.shape, np.uint8)
+                cv2.fillPoly(region["polygon_mask"], [points.astype(np.int32)], 255)
+            cv2.bitwise_and(mask, region["polygon_mask"], dst=mask)
+
+        if region["morphology"] is not None:
+            mask = region["morphology"].apply(mask)
+        else:
+            mask = apply_filter(mask, self.filter_type)
+
+        contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = []
+        for c in contours:
+            x, y, w, h = cv2.boundingRect(c)
+            if self.scale != 1.0:
+                x, y, w, h = (round(v / self.scale) for v in (x, y, w, h))
+            if w >= self.min_width and h >= self.min_height:
+                boxes.append((x + offset_x, y + offset_y, w, h))
+        return boxes
+
+    def process(self, frame):
+        """Process one frame and return its event dict."""
+        self.frame_index += 1
+        self.frames_processed += 1
+        boxes = self.detect(frame)
+        tracks = self.tracker.update(boxes)
+
+        # The first masks of a fresh background model are mostly foreground
+        crossings = 0
+        if self.frames_processed > self.warmup_frames:
+            for track in tracks:
+                if not track["counted"] and self.has_crossed(track):
+                    track["counted"] = True
+                    crossings += 1
+        self.vehicle_count += crossings
+
+        return {
+            "frame": self.frame_index,
+            "boxes": boxes,
+            "centroids": [get_centroid(*box) for box in boxes],
+            "tracks": [(track["id"], track["centroid"]) for track in tracks],
+            "crossings": crossings,
+            "count": self.vehicle_count,
+        }
+
+    def has_crossed(self, track):
+        """A track crosses when it lands in the line band or jumps over the line."""
+        y = track["centroid"][1]
+        if (
+            (self.roi_line + self.pixel_offset)
+            > y
+            > (self.roi_line - self.pixel_offset)
+        ):
+            return True
+        if track["previous"] is None:
+            return False
+        return (track["previous"][1] < self.roi_line) != (y < self.roi_line)
+
+    def iter_events(self, source):
+        """Yield one event dict per frame of ``source`` (see ``iter_frames``)."""
+        for frame in iter_frames(source):
+            yield self.process(frame)
+
+    def run(self, source, keep_events=True):
+        """Count vehicles over a whole source as fast as frames can be decoded."""
+        events = []
+        for event in self.iter_events(source):
+            if keep_events:
+                events.append(event)
+        return {
+            "count": self.vehicle_count,
+            "frames": self.frame_index + 1,
+            "events": events,
+        }
+
+
+def line_band(roi_line=ROI_LINE, half_height=100):
+    """Full-width processing region around the counting line (x, y, w, h)."""
+    return (0, max(0, roi_line - half_height), None, 2 * half_height)
+
+
+def _count_segment(video_path, start, end, warmup_frames, keep_events, counter_kwargs):
+    """Count crossings in frames [start, end) after warming up on a prefix.
+
+    Warm-up frames go through the full pipeline so the background model and
+    the tracks are settled, but their crossings belong to the previous
+    segment and are discarded.
+    """
+    first = max(0, start - warmup_frames)
+    cap = cv2.VideoCapture(video_path)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+    cap = FrameSource(cap)
+    counter = VehicleCounter(**counter_kwargs)
+    counter.frame_index = first - 1
+
+    count, events = 0, []
+    try:
+        while counter.frame_index + 1 < end:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            event = counter.process(frame)
+            if event["frame"] < start:
+                continue
+            count += event["crossings"]
+            if keep_events:
+                events.append(event)
+    finally:
+        cap.release()
+    return count, counter.frame_index + 1 - start, events
+
+
+def count_video_parallel(
+    video_path, workers=None, warmup_frames=None, keep_events=False, **counter_kwargs
+):
+    """Split a video file into time segments and count them in a process pool.
+
+    Every frame is owned by exactly one segment, so a crossing is only
+    reported by the worker that owns its frame. Each worker first runs
+    ``warmup_frames`` frames before its segment, by default
+    ``subtractor_warmup``; segments are never shorter than the warm-up, so
+    short videos use fewer workers.
+
+    Only algorithms in ``PARALLEL_ALGORITHMS`` are split: the others, and
+    files whose frame count cannot be read, are counted in one sequential
+    run. Returns the dict of ``VehicleCounter.run`` plus the ``workers``
+    actually used.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    algorithm_type = counter_kwargs.get("algorithm_type", "MOG2")
+    if warmup_frames is None:
+        warmup_frames = subtractor_warmup(algorithm_type)
+
+    cap = cv2.VideoCapture(str(video_path))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+
+    if algorithm_type not in PARALLEL_ALGORITHMS:
+        logger.warning(
+            "%s does not settle within its warm-up; counting sequentially",
+            algorithm_type,
+        )
+        workers = 1
+    elif total_frames <= 0:
+        logger.warning("Unknown frame count of %s; counting sequentially", video_path)
+        workers = 1
+    else:
+        max_workers = max(1, total_frames // max(1, warmup_frames))
+        workers = max(1, min(workers or os.cpu_count() or 1, max_workers))
+
+    if workers == 1:
+        counter = VehicleCounter(**counter_kwargs)
+        return {**counter.run(str(video_path), keep_events), "workers": 1}
+
+    bounds = np.linspace(0, total_frames, workers + 1).astype(int)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(
+                _count_segment,
+                str(video_path),
+                int(start),
+                int(end),
+                warmup_frames,
+                keep_events,
+                counter_kwargs,
+            )
+            for start, end in zip(bounds[:-1], bounds[1:])
+            if end > start
+        ]
+        results = [future.result() for future in futures]
+
+    vehicle_count, frames, events = 0, 0, []
+    for count, segment_frames, segment_events in results:
+        running = vehicle_count
+        for event in segment_events:
+            running += event["crossings"]
+            event["count"] = running
+        events.extend(segment_events)
+        vehicle_count += count
+        frames += segment_frames
+
+    return {
+        "count": vehicle_count,
+        "frames": frames,
+        "events": events,
+        "workers": workers,
+    }
+
+
+def draw_detections(frame, event, roi_line=ROI_LINE):
+    """Draw the ROI line, boxes and centroids of an event onto ``frame``."""
+    line_color = (0, 127, 255) if event["crossings"] else (255, 127, 0)
+    line_end = min(LINE_X_END, frame.shape[1] - 1)
+    cv2.line(frame, (LINE_X_START, roi_line), (line_end, roi_line), line_color, 3)
+    for x, y, w, h in event["boxes"]:
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+    for centroid in event["centroids"]:
+        cv2.circle(frame, centroid, 4, (0, 0, 255), -1)
+    for track_id, (cx, cy) in event.get("tracks", []):
+        cv2.putText(
+            frame,
+            str(track_id),
+            (cx + 6, cy - 6),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (0, 0, 255),
+            1,
+        )
+    return frame
+
+
 def save_uploaded_file(uploaded_file):
     if uploaded_file is None:
         return None
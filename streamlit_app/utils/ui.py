@@ -1,7 +1,7 @@
 import streamlit as st
 from datetime import datetime
-import base64
-import os
+
+from utils.media import media_src
 
 
 def configure_page(page_title="Computer Vision Hub", page_icon="👁️"):
@@ -84,27 +84,20 @@ def render_sidebar_info():
     )
 
 
-@st.cache_data(show_spinner=False)
-def get_image_base64(image_path):
-    """Loads a local image and converts it to base64 for HTML embedding."""
-    if image_path.startswith("http"):
-        return image_path
-
-    abs_path = os.path.abspath(image_path)
-    if not os.path.exists(abs_path):
-        return "https://via.placeholder.com/600x250.png?text=FEED+LOST"
-
-    with open(abs_path, "rb") as img_file:
-        encoded = base64.b64encode(img_file.read()).decode()
-        ext = abs_path.split(".")[-1]
-        return f"data:image/{ext};base64,{encoded}"
+def render_demo(image_path):
+    """Shows a demo animation at column width (static file when built, else inlined)."""
+    st.markdown(
+        f'<img src="{media_src(image_path)}" width="100%" loading="lazy" '
+        'style="border-radius: 8px;">',
+        unsafe_allow_html=True,
+    )
 
 
 def cctv_card(title, image_path, link_text="View Feed"):
     """Renders a CCTV styled card."""
 
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    b64_src = get_image_base64(image_path)
+    img_src = media_src(image_path)
 
     st.markdown(f"### {title}")
 
@@ -112,7 +105,7 @@ def cctv_card(title, image_path, link_text="View Feed"):
     html = f"""
     <div class="cctv-frame" style="margin-bottom: 20px;">
         <div class="cctv-label">● REC</div>
-        <img src="{b64_src}" style="width: 100%; height: 250px; object-fit: cover; border-radius: 4px;" alt="{title}">
+        <img src="{img_src}" loading="lazy" style="width: 100%; height: 250px; object-fit: cover; border-radius: 4px;" alt="{title}">
         <div class="cctv-timestamp">{current_time}</div>
     </div>
     """
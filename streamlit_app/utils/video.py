@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class FrameSource:
+    """Decodes frames on a background thread into a bounded ring buffer.
+
+    Drop-in replacement for the ``cv2.VideoCapture`` calls used by the loops
+    (``isOpened``, ``read``, ``release``). Files block the decoder when the
+    buffer is full so no frame is lost; cameras default to a latest-frame-only
+    policy where stale frames are dropped instead of queued.
+    """
+
+    def __init__(self, source, buffer_size=8, latest_only=None):
+        if isinstance(source, cv2.VideoCapture):
+            self.cap = source
+        else:
+            self.cap = cv2.VideoCapture(source)
+        if latest_only is None:
+            latest_only = isinstance(source, int)
+
+        self.latest_only = latest_only
+        self.buffer_size = 1 if latest_only else max(1, buffer_size)
+        self.buffer = deque(maxlen=self.buffer_size)
+        self.condition = threading.Condition()
+
+        self.frames_read = 0
+        self.frames_delivered = 0
+        self.frames_dropped = 0
+        self.max_queue_depth = 0
+        self._opened = self.cap.isOpened()
+        self._finished = not self._opened
+        self._stopped = False
+
+        self.thread = threading.Thread(target=self._decode, daemon=True)
+        if self._opened:
+            self.thread.start()
+
+    def _decode(self):
+        while True:
+            ret, frame = self.cap.read()
+            with self.condition:
+                if not ret or self._stopped:
+                    self._finished = True
+                    self.condition.notify_all()
+                    return
+
+                self.frames_read += 1
+                if self.latest_only:
+                    if self.buffer:
+                        self.frames_dropped += 1
+                else:
+                    while len(self.buffer) >= self.buffer_size and not self._stopped:
+                        self.condition.wait()
+                self.buffer.append(frame)
+                self.max_queue_depth = max(self.max_queue_depth, len(self.buffer))
+                self.condition.notify_all()
+
+    def isOpened(self):
+        return self._opened and not self._stopped
+
+    @property
+    def finished(self):
+        """True once the source is exhausted and every buffered frame was read."""
+        with self.condition:
+            return self._finished and not self.buffer
+
+    def read(self, timeout=None):
+        """Return ``(ret, frame)`` like ``VideoCapture.read``, waiting for the decoder."""
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.buffer or self._finished or self._stopped, timeout
+            )
+            if not self.buffer:
+                return False, None
+            frame = self.buffer.popleft()
+            self.frames_delivered += 1
+            self.condition.notify_all()
+            return True, frame
+
+    def get(self, prop_id):
+        return self.cap.get(prop_id)
+
+    def stats(self):
+        """Decoder counters: frames read, delivered, dropped and queue depth."""
+        with self.condition:
+            return {
+                "read": self.frames_read,
+                "delivered": self.frames_delivered,
+                "dropped": self.frames_dropped,
+                "queue_depth": len(self.buffer),
+                "max_queue_depth": self.max_queue_depth,
+            }
+
+    def release(self):
+        with self.condition:
+            self._stopped = True
+            self.buffer.clear()
+            self.condition.notify_all()
+        if self.thread.is_alive():
+            self.thread.join()
+        self.cap.release()
+
+    def __iter__(self):
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class RenderThrottle:
+    """Rate limiter that decouples UI pushes from the analysis loop.
+
+    ``due()`` returns True at most ``fps`` times per second, so a loop can
+    analyse every frame and only draw/push some of them; ``fps=0`` never
+    renders (metrics only). Also tracks the analysis rate seen by ``tick``.
+    """
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps if fps else None
+        self.next_time = 0.0
+        self.ticks = 0
+        self.window_start = time.monotonic()
+        self.window_ticks = 0
+        self.fps = 0.0
+
+    def due(self, now=None):
+        if self.interval is None:
+            return False
+        now = time.monotonic() if now is None else now
+        if now < self.next_time:
+            return False
+        # Keep a steady cadence, but do not burst to catch up after a stall
+        if now - self.next_time > self.interval:
+            self.next_time = now + self.interval
+        else:
+            self.next_time += self.interval
+        return True
+
+    def tick(self):
+        """Count one analysed frame and refresh the measured rate every second."""
+        self.ticks += 1
+        self.window_ticks += 1
+        now = time.monotonic()
+        elapsed = now - self.window_start
+        if elapsed >= 1.0:
+            self.fps = self.window_ticks / elapsed
+            self.window_start = now
+            self.window_ticks = 0
+        return self.fps